@@ -26,6 +26,10 @@ extensions = [
   'sphinx.ext.napoleon',
 ]
 
+# render defaults as written in source (eg. f"/tmp/{uuid4()}") instead of
+# their evaluated values
+autodoc_preserve_defaults = True
+
 templates_path = ['_templates']
 exclude_patterns = ['_build', 'Thumbs.db', '.DS_Store']
 
@@ -1,17 +1,30 @@
 from typing import Any
+from functools import lru_cache
 import json
+import time
 import logging as log
+import boto3
 
 
 # log = logging.getLogger(__name__)
 
+# SecretStrings by (name, region, endpoint, cache key or access key), with
+# the time.monotonic() they were retrieved at
+_SECRET_CACHE: dict[tuple, tuple[float, str]] = {}
+_SECRET_TTL = 300  # seconds
 
-def get_secret(secret_name: str, sm_client):
-    """Retrieve and `json.loads()` a Secret from SecretsManager
+
+def get_secret(secret_name: str, sm_client, cache_key: str = None):
+    """Retrieve and `json.loads()` a Secret from SecretsManager.
+    Results are cached in-process for `_SECRET_TTL` seconds, per secret,
+    client region and endpoint, and `cache_key`. Every call returns a new dict.
 
     Args:
         secret_name (str): name fo the ssecret
         sm_client (SecretsManagerClient): _description_
+        cache_key (str, optional): who sm_client signs requests as, eg. an
+            assumed role's ARN. Pass it if that's not the default credentials,
+            whose access key is used otherwise.
 
     Returns:
         dict[str, Any]: secret object
@@ -22,11 +35,59 @@ def get_secret(secret_name: str, sm_client):
         >>> sm_client = boto3.client("secretsmanager")
         >>> get_secret("trz-docs-test", sm_client)
         {'key1': 'value1'}
+        >>> # second call is served from the cache
+        >>> get_secret("trz-docs-test", sm_client)
+        {'key1': 'value1'}
     """
-    log.info(f"retrieving secret '{secret_name}'...")
-    response = sm_client.get_secret_value(SecretId=secret_name)
+    key = (secret_name, *_client_key(sm_client, cache_key))
+    ts, secret_string = _SECRET_CACHE.get(key, (0, None))
+    if secret_string is not None and time.monotonic() - ts < _SECRET_TTL:
+        log.info("using cached secret '%s'.", secret_name)
+    else:
+        log.info("retrieving secret '%s'...", secret_name)
+        response = sm_client.get_secret_value(SecretId=secret_name)
+        secret_string = response['SecretString']
+        _SECRET_CACHE[key] = (time.monotonic(), secret_string)
+        log.info("secret retrieved successfully.")
 
-    secret: dict[str, Any] = json.loads(response['SecretString'])
-    log.info("secret retrieved successfully.")
+    # parsed again each time, so callers can't change each other's secret
+    secret: dict[str, Any] = json.loads(secret_string)
 
     return secret
+
+
+def _client_key(client, cache_key: str = None) -> tuple[str, str, str | None]:
+    """where a client sends requests and who it signs them as, since another
+    region or account can have a secret of the same name
+
+    Example:
+        >>> from trz_py_utils.aws import get_secret
+        >>> import boto3, json
+        >>> from botocore.stub import Stubber
+        >>> def stubbed_client(value):
+        ...     client = boto3.client("secretsmanager",
+        ...                           region_name="us-east-2")
+        ...     stubber = Stubber(client)
+        ...     stubber.add_response(
+        ...         "get_secret_value",
+        ...         {"SecretString": json.dumps({"key1": value})},
+        ...         {"SecretId": "trz-docs-stubbed"})
+        ...     stubber.activate()
+        ...     return client
+        >>> get_secret("trz-docs-stubbed", stubbed_client("a"), "role-a")
+        {'key1': 'a'}
+        >>> # other credentials, so not served role-a's cached secret
+        >>> get_secret("trz-docs-stubbed", stubbed_client("b"), "role-b")
+        {'key1': 'b'}
+    """
+    if cache_key is None:
+        credentials = _default_credentials()
+        cache_key = credentials.get_frozen_credentials().access_key \
+            if credentials else None
+    return client.meta.region_name, client.meta.endpoint_url, cache_key
+
+
+@lru_cache(maxsize=1)
+def _default_credentials():
+    """resolved once, the credential chain can mean a metadata request"""
+    return boto3.Session().get_credentials()
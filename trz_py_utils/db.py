@@ -1,15 +1,48 @@
 from typing import Any
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+import io
+import re
+from itertools import islice
+from threading import Lock
+from uuid import uuid4
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from psycopg2._psycopg import connection as Connection
 import logging as log
 
 
 # log = logging.getLogger(__name__)
 
+# row count above which fast_insert_into() switches to COPY FROM STDIN
+COPY_THRESHOLD = 1000
+# values _pg_escape() writes the way psycopg2 would adapt them, other types
+# (eg. lists, dicts, bytes) are left to execute_values()
+COPY_TYPES = frozenset(
+    {str, int, float, bool, Decimal, date, datetime, time, type(None)})
+# rows handed to a single execute_values() call, to bound memory
+MAX_CHUNK_ROWS = 200_000
+# rows per round-trip when execute_sql() is given a list of values
+PAGE_SIZE = 1000
+# single-row 'INSERT INTO t (cols) VALUES (...)', group 1 is the row template
+RE_INSERT_VALUES = re.compile(
+    r"^\s*INSERT\s+INTO\s+\S+\s*\([^)]*\)\s*VALUES\s*(\([^)]*\))\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL)
+
+# only lasts until the end of the current transaction
+SQL_ASYNC_COMMIT = "SET LOCAL synchronous_commit = OFF"
+
+# one pool of open connections per database uri, see pooled()
+_POOLS: dict[str, ThreadedConnectionPool] = {}
+_POOLS_LOCK = Lock()
+
 
 def connect(uri: str):
     """Connects to pg using uri like 'postgresql://user:pw@host:port'.
+    Each call opens a new connection, see `pooled()` to reuse them.
 
     Args:
         uri (str): Address with credentials and port for database.
@@ -32,8 +65,75 @@ def connect(uri: str):
         log.info("connected!")
         return conn
     except Exception as e:
-        log.error(f"unable to connect to database: {e}")
+        log.error("unable to connect to database: %s", e)
+        raise
+
+
+def _get_pool(uri: str, minconn: int, maxconn: int) -> ThreadedConnectionPool:
+    """the pool of `uri`, made by the first caller (of any thread) to ask."""
+    try:
+        return _POOLS[uri]
+    except KeyError:
+        with _POOLS_LOCK:
+            if uri not in _POOLS:
+                _POOLS[uri] = ThreadedConnectionPool(minconn, maxconn, uri)
+            return _POOLS[uri]
+
+
+def release(connection: Connection, uri: str):
+    """Returns a connection from `pooled()` to its pool (or closes it
+    if it didn't come from one, eg. `connect()`).
+
+    Args:
+        connection (Connection): psycopg connection.
+        uri (str): same uri the connection was made with.
+
+    Example:
+        >>> from trz_py_utils.db import connect, release
+        >>> import os; uri = os.environ.get("PG_DB_URI")
+        >>> conn = connect(uri)
+        >>> release(conn, uri)
+        >>> conn.closed
+        1
+    """
+    try:
+        _POOLS[uri].putconn(connection)
+    except (KeyError, PoolError):
+        connection.close()
+
+
+@contextmanager
+def pooled(uri: str, minconn=1, maxconn=16):
+    """Context manager yielding a connection from a pool kept per uri, so
+    repeated calls skip the TCP/auth handshake. It's released on exit.
+    If the pool is exhausted, a plain unpooled connection is used instead.
+
+    Args:
+        uri (str): Address with credentials and port for database.
+        minconn (int, optional): connections kept open. Defaults to 1.
+        maxconn (int, optional): max pooled connections. Defaults to 16.
+
+    Example:
+        >>> from trz_py_utils.db import pooled, execute_sql
+        >>> import os; uri = os.environ.get("PG_DB_URI")
+        >>> with pooled(uri) as conn:
+        ...     execute_sql(conn, "SELECT 1", is_return=True)
+        [(1,)]
+    """
+    log.info("connecting to database...")
+    try:
+        conn = _get_pool(uri, minconn, maxconn).getconn()
+        log.info("connected!")
+    except PoolError as e:
+        log.warning("%s, opening unpooled connection", e)
+        conn = connect(uri)
+    except Exception as e:
+        log.error("unable to connect to database: %s", e)
         raise
+    try:
+        yield conn
+    finally:
+        release(conn, uri)
 
 
 def fast_insert_into(connection: Connection,
@@ -44,26 +144,45 @@ def fast_insert_into(connection: Connection,
     """sends entire SQL string with values from cursor.mogrify()
     https://stackoverflow.com/a/10147451/5563327
 
+    Commits with `synchronous_commit = OFF` unless `sync_commit=True`
+    is passed, see `copy_insert()`.
+
+    More than COPY_THRESHOLD rows are sent with `copy_insert()` instead, as
+    long as no `sql` or other kwargs are passed and every value is one of
+    COPY_TYPES.
+
     Example:
         >>> from trz_py_utils import db
         >>> import os; uri = os.environ.get("PG_DB_URI");
-        >>> db.execute_sql(connect(uri), "CREATE TABLE fast(col1 VARCHAR);")
-        >>> db.fast_insert_into(
-        ...     connection=connect(uri),
-        ...     table="fast",
-        ...     rows=[{"col1": 1}, {"col1": 2}, {"col1": 3}, {"col1": 4}], )
-        >>> db.execute_sql(connect(uri), "SELECT * FROM fast", is_return=True)
+        >>> with db.pooled(uri) as conn:
+        ...     db.execute_sql(conn, "CREATE TABLE fast(col1 VARCHAR);")
+        ...     db.fast_insert_into(
+        ...         connection=conn,
+        ...         table="fast",
+        ...         rows=[{"col1": 1}, {"col1": 2}, {"col1": 3}, {"col1": 4}])
+        ...     db.execute_sql(conn, "SELECT * FROM fast", is_return=True)
         [('1',), ('2',), ('3',), ('4',)]
 
     Example:
         >>> from trz_py_utils import db
         >>> import os; uri = os.environ.get("PG_DB_URI");
-        >>> db.execute_sql(connect(uri), "CREATE TABLE fast2(col1 VARCHAR);")
-        >>> db.fast_insert_into(
-        ...     connection=connect(uri),
-        ...     table="fast",
-        ...     rows=[], )
-        >>> db.execute_sql(connect(uri), "SELECT * FROM fast2", is_return=True)
+        >>> with db.pooled(uri) as conn:
+        ...     db.execute_sql(conn, "CREATE TABLE fast3(a INT, b JSONB);")
+        ...     db.fast_insert_into(
+        ...         connection=conn,
+        ...         table="fast3",
+        ...         rows=[{"a": 1, "b": '{"x": 1}'}],
+        ...         template="(%s, %s::jsonb)")
+        ...     db.execute_sql(conn, "SELECT * FROM fast3", is_return=True)
+        [(1, {'x': 1})]
+
+    Example:
+        >>> from trz_py_utils import db
+        >>> import os; uri = os.environ.get("PG_DB_URI");
+        >>> with db.pooled(uri) as conn:
+        ...     db.execute_sql(conn, "CREATE TABLE fast2(col1 VARCHAR);")
+        ...     db.fast_insert_into(connection=conn, table="fast2", rows=[])
+        ...     db.execute_sql(conn, "SELECT * FROM fast2", is_return=True)
         []
     """
     if not isinstance(rows, list):
@@ -74,16 +193,155 @@ def fast_insert_into(connection: Connection,
     elif not isinstance(rows[0], dict):
         raise ValueError("must pass list[dict[str, Any]]!")
     num_rows = len(rows)
-
-    cols = ",".join(rows[0].keys())
-    row_tuples = tuple(tuple(row.values()) for row in rows)
+    # bulk loads can be retried, so don't wait on WAL fsync at commit
+    sync_commit = kwargs.pop("sync_commit", False)
+    if num_rows > COPY_THRESHOLD and sql is None and not kwargs \
+            and _is_copyable(rows):
+        return copy_insert(connection, table, rows, sync_commit=sync_commit)
+
+    keys = list(rows[0].keys())
+    cols = ",".join(keys)
+    # named placeholders let execute_values() take the dict rows as-is,
+    # unless the caller passed their own (eg. with "::jsonb" casts)
+    template = kwargs.pop("template", None) \
+        or "(" + ",".join(f"%({k})s" for k in keys) + ")"
+    is_named = "%(" in template
+    page_size = kwargs.pop("page_size", 10000)
     sql = sql or f"INSERT INTO {table} ({cols}) VALUES %s"
-    log.debug(f"cols={cols}, rows={row_tuples}")
+    if log.getLogger().isEnabledFor(log.DEBUG):
+        log.debug("cols=%s, rows=%s", cols, rows)
     try:
         with connection.cursor() as cursor:
-            execute_values(cursor, sql, row_tuples, **kwargs)
+            if not sync_commit:
+                cursor.execute(SQL_ASYNC_COMMIT)
+            iter_rows = iter(rows)
+            while True:
+                chunk = list(islice(iter_rows, MAX_CHUNK_ROWS))
+                if not chunk:
+                    break
+                execute_values(cursor, sql,
+                               _template_args(chunk, keys, is_named),
+                               template=template,
+                               page_size=page_size,
+                               **kwargs)
         connection.commit()
-        log.info(f"inserted {num_rows} rows.")
+        log.info("inserted %d rows.", num_rows)
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        raise e
+
+
+def _template_args(chunk: list[dict[str, Any]], keys: list[str],
+                   is_named: bool) -> list:
+    """rows as execute_values() arguments: dicts for a template of named
+    `%(col)s` placeholders, else tuples in `keys` order for positional `%s`.
+
+    Example:
+        >>> from trz_py_utils.db import _template_args
+        >>> rows = [{"a": 1, "b": '{"x": 1}'}, {"b": "{}", "a": 2}]
+        >>> _template_args(rows, ["a", "b"], is_named=True) is rows
+        True
+        >>> _template_args(rows, ["a", "b"], is_named=False)
+        [(1, '{"x": 1}'), (2, '{}')]
+    """
+    if is_named:
+        return chunk
+    return [tuple(row[k] for k in keys) for row in chunk]
+
+
+def _is_copyable(rows: list[dict[str, Any]]) -> bool:
+    """whether copy_insert() would insert the same values execute_values()
+    does, ie. every value is of one of COPY_TYPES.
+
+    Example:
+        >>> from trz_py_utils.db import _is_copyable
+        >>> _is_copyable([{"a": 1, "b": "x"}, {"a": None, "b": 2.5}])
+        True
+        >>> _is_copyable([{"a": 1, "b": [1, 2]}])
+        False
+    """
+    return all(type(value) in COPY_TYPES
+               for row in rows for value in row.values())
+
+
+def _pg_escape(value: Any):
+    """Format a value for the text format of `COPY ... FROM STDIN`.
+
+    Example:
+        >>> from trz_py_utils.db import _pg_escape
+        >>> _pg_escape(None)
+        '\\\\N'
+        >>> _pg_escape("a\\tb\\nc")
+        'a\\\\tb\\\\nc'
+        >>> _pg_escape(1)
+        '1'
+        >>> _pg_escape(True)
+        'true'
+    """
+    if value is None:
+        return "\\N"
+    elif value is True or value is False:
+        # the literals psycopg2 sends, not 'True', for text columns too
+        return "true" if value else "false"
+    elif isinstance(value, (date, time)):
+        # as psycopg2 does, with a "T" between datetime's date and time
+        value = value.isoformat()
+    return (str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r"))
+
+
+def copy_insert(connection: Connection,
+                table: str,
+                rows: list[dict[str, Any]],
+                sync_commit=False):
+    """Bulk inserts rows with `COPY ... FROM STDIN` via cursor.copy_expert().
+    Rows are serialized to an in-memory TSV buffer and sent in one go,
+    instead of a parse/bind cycle per row.
+
+    Args:
+        connection (Connection): psycopg connection (`connect(url)`).
+        table (str): name of the database table to insert into.
+        rows (list[dict[str, Any]]): rows whose keys are column names.
+        sync_commit (bool, optional): wait for the WAL to be flushed to disk
+            on commit. Off by default: a crash may lose the load (never
+            corrupt it), so it can be retried. Defaults to False.
+
+    Example:
+        >>> from trz_py_utils import db
+        >>> import os; uri = os.environ.get("PG_DB_URI");
+        >>> with db.pooled(uri) as conn:
+        ...     db.execute_sql(conn, "CREATE TABLE copy1(col1 VARCHAR);")
+        ...     db.copy_insert(
+        ...         connection=conn,
+        ...         table="copy1",
+        ...         rows=[{"col1": "a\\tb"}, {"col1": None}], )
+        ...     db.execute_sql(conn, "SELECT * FROM copy1", is_return=True)
+        [('a\\tb',), (None,)]
+    """
+    if not len(rows):
+        log.info("skipping 0-length rows")
+        return
+    keys = list(rows[0].keys())
+    cols = ",".join(keys)
+
+    buf = io.StringIO()
+    for row in rows:
+        # by key, like execute_values(), in case rows order them differently
+        buf.write("\t".join(_pg_escape(row[k]) for k in keys) + "\n")
+    buf.seek(0)
+
+    sql = f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT text)"
+    try:
+        with connection.cursor() as cursor:
+            if not sync_commit:
+                cursor.execute(SQL_ASYNC_COMMIT)
+            cursor.copy_expert(sql, buf)
+        connection.commit()
+        log.info("copied %d rows.", len(rows))
     except Exception as e:
         if connection:
             connection.rollback()
@@ -103,15 +361,34 @@ def make_sql_insert_into(table: str,
     >>> make_sql_insert_into("mytable", data)
     'INSERT INTO mytable (mycol1, mycol2) VALUES (%s, %s)'
     """
-    log.info(f"making 'INSERT' SQL for '{table}'...")
-    columns = ', '.join(data.keys())
-    vals = ["%s" for v in data.values()]
+    return _make_sql_insert_cached(table, tuple(data.keys()))
+
+
+@lru_cache(maxsize=256)
+def _make_sql_insert_cached(table: str, cols: tuple[str, ...]):
+    """the SQL only depends on table and column names, so build it once."""
+    log.info("making 'INSERT' SQL for '%s'...", table)
+    columns = ', '.join(cols)
+    vals = ["%s" for _ in cols]
     sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(vals)})"
     log.info("done making INSERT INTO statement.")
 
     return sql
 
 
+def _execute_many(cursor, sql: str, values: list):
+    """run `sql` once per item of `values`, paged to cut round-trips."""
+    m = RE_INSERT_VALUES.match(sql)
+    if m:
+        # one multi-row INSERT per page instead of one statement per row
+        sql_values = sql[:m.start(1)] + "%s" + sql[m.end(1):]
+        execute_values(cursor, sql_values, values,
+                       template=m.group(1),
+                       page_size=PAGE_SIZE)
+    else:
+        execute_batch(cursor, sql, values, page_size=PAGE_SIZE)
+
+
 def execute_sql(connection: Connection, sql: str,
                 values: tuple = None, is_return=False):
     """Tries its best to run SQL statements and recover from errors.
@@ -170,21 +447,21 @@ def execute_sql(connection: Connection, sql: str,
     """
     log.info("executing sql...")
     response = None
-    log.debug(f"sql={sql}")
-    log.debug(f"values={values}")
+    log.debug("sql=%s", sql)
+    log.debug("values=%s", values)
 
     def try_fetch(cursor):
         try:
             return cursor.fetchall()
         except psycopg2.ProgrammingError as e:
             if "no results to fetch" in str(e):
-                log.warn(f"{e}")
+                log.warn("%s", e)
                 return None
 
     try:
         with connection.cursor() as cursor:
             if isinstance(values, list):
-                cursor.executemany(sql, values)
+                _execute_many(cursor, sql, values)
             else:
                 cursor.execute(sql, values)
             log.info("executed.")
@@ -194,7 +471,7 @@ def execute_sql(connection: Connection, sql: str,
         log.debug("committed.")
     except Exception as e:
         # handle the exception, log it, and then roll back the transaction
-        log.error(f"{e}")
+        log.error("%s", e)
         if connection:
             connection.rollback()
         raise e
@@ -204,6 +481,66 @@ def execute_sql(connection: Connection, sql: str,
     return response
 
 
+def stream_sql(connection: Connection, sql: str,
+               values: tuple = None, itersize=10000):
+    """Yields rows of a `SELECT` from a server-side (named) cursor,
+    fetching `itersize` rows per round-trip instead of `fetchall()`.
+
+    Args:
+        connection (Connection): psycopg connection (`connect(url)`).
+        sql (str): `SELECT` statement to execute on the database.
+        values (tuple, optional): variables to interpolate into SQL statement.
+            Defaults to None.
+        itersize (int, optional): rows fetched per round-trip.
+            Defaults to 10000.
+
+    Yields:
+        tuple[Any]: one row of the result set.
+
+    Example:
+        >>> from trz_py_utils.db import pooled, execute_sql, stream_sql
+        >>> import os; uri = os.environ.get("PG_DB_URI");
+        >>> sql_statement = '''
+        ...     CREATE TABLE IF NOT EXISTS t3(col1 VARCHAR);
+        ...     INSERT INTO t3 (col1) VALUES ('val1');'''
+        >>> with pooled(uri) as connection:
+        ...     execute_sql(connection, sql_statement)
+        ...     list(stream_sql(connection, "SELECT col1 FROM t3"))
+        [('val1',)]
+    """
+    log.info("streaming sql...")
+    log.debug("sql=%s", sql)
+    with connection.cursor(name=f"c_{uuid4().hex}") as cursor:
+        cursor.itersize = itersize
+        cursor.execute(sql, values)
+        yield from cursor
+
+
+def copy_out(connection: Connection, sql: str, fileobj):
+    """Writes the result of a `SELECT` into `fileobj` with
+    `COPY (...) TO STDOUT`, skipping per-row protocol parsing.
+
+    Args:
+        connection (Connection): psycopg connection (`connect(url)`).
+        sql (str): `SELECT` statement to export.
+        fileobj: binary file-like object to write into.
+
+    Example:
+        >>> from trz_py_utils.db import pooled, copy_out
+        >>> import io, os; uri = os.environ.get("PG_DB_URI");
+        >>> buf = io.BytesIO()
+        >>> with pooled(uri) as conn:
+        ...     copy_out(conn, "SELECT 1", buf)
+        >>> buf.getvalue()[:5]
+        b'PGCOP'
+    """
+    log.info("copying sql result out...")
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT BINARY)",
+                           fileobj)
+    log.info("done copying out.")
+
+
 def add_row(connection: Connection, table: str,
             data: dict[str, Any], **kwargs):
     """Inserts a single record into a postgres database table
@@ -218,17 +555,16 @@ def add_row(connection: Connection, table: str,
         list[tuple[Any]] | None: db reply if `is_return` arg is truthy.
 
     Example:
-        >>> from trz_py_utils.db import connect, add_row, execute_sql
+        >>> from trz_py_utils.db import pooled, add_row, execute_sql
         >>> import os; uri = os.environ.get("PG_DB_URI")
-        >>> conn = connect(uri)
-        >>> execute_sql(conn, "CREATE TABLE IF NOT EXISTS t2(col1 VARCHAR);")
-        >>> add_row(
-        ...     connection=conn,
-        ...     table="t2",
-        ...     data={"col1": "val1"})
+        >>> sql = "CREATE TABLE IF NOT EXISTS t2(col1 VARCHAR);"
+        >>> with pooled(uri) as conn:
+        ...     execute_sql(conn, sql)
+        ...     for i in range(3):
+        ...         add_row(connection=conn, table="t2", data={"col1": i})
     """
     sql_insert = make_sql_insert_into(table, data)
     values = tuple(data.values())
-    log.info(f"adding row to db table '{table}'...")
+    log.info("adding row to db table '%s'...", table)
 
     return execute_sql(connection, sql_insert, values=values, **kwargs)
@@ -1,22 +1,41 @@
 import logging as log
 from typing import Iterator
 from uuid import uuid4
-from charset_normalizer import from_path
+from charset_normalizer import from_bytes
+import mmap
+import shutil
 import subprocess
 import re
 from re import Match
 import json
-from io import TextIOWrapper
+from functools import lru_cache
+from itertools import islice
+import locale
 import enlighten
 import time
+import os
 
-from .fmt import percent
+from .fmt import percent, sizeof_fmt
+
+try:
+    import magic  # python-magic, optional
+except ImportError:
+    magic = None
 
 
 # log = logging.getLogger(__name__)
 # print("trz-py-utils file.py logging hierarchy:")
 # print(logging.)
 
+# default pattern for rejecting lines with non-ascii characters
+RE_NON_ASCII = r"[^\x00-\x7F]"
+# lines between progress bar updates, each update has a cost
+PBAR_EVERY = 1024
+# bytes read per chunk by BadFileReader before splitting lines
+READ_CHUNK_BYTES = 1 << 20
+# buffer size for file objects read or written a little at a time
+IO_BUFFER_BYTES = 1 << 20
+
 
 def read_file(path: str):
     """returns string contents of file given filepath.
@@ -37,34 +56,190 @@ def read_file(path: str):
         'hello world!'
     """
     log.info(f"loading file '{path}'...")
-    with open(path, 'r') as f:
-        return f.read()
+    with open(path, 'rb') as f:
+        # one buffer sized up-front, instead of growing it while reading
+        buf = bytearray(os.fstat(f.fileno()).st_size)
+        del buf[f.readinto(buf):]
+        # pipes and procfs report size 0, or the file grew since fstat()
+        buf += f.read()
+    text = buf.decode(locale.getpreferredencoding(False))
+    # same newline translation as reading in text mode
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def remove_crlf(src: str, dest=None, chunk_size=1 << 20):
+    """Convert '\\r\\n' line endings to '\\n', working on raw bytes.
 
+    Args:
+        src (str): filepath to read
+        dest (str, optional): filepath to write. Defaults to /tmp/{uuid4()}.
+        chunk_size (int, optional): bytes per read. Defaults to 1MB.
+
+    Returns:
+        str: path to output file
 
-def remove_crlf(src: str, dest=None):
+    Example:
+        >>> from trz_py_utils.file import remove_crlf
+        >>> src = "/tmp/remove_crlf_example"
+        >>> with open(src, "wb") as f:
+        ...     _ = f.write(b"a~b\\r\\nc~d\\r\\n")
+        >>> open(remove_crlf(src, chunk_size=4), "rb").read()
+        b'a~b\\nc~d\\n'
+    """
     dest = dest or f"/tmp/{uuid4()}"
-    with open(src, 'r', newline='\n') as fi:
-        with open(dest, 'w', newline='\n') as fo:
-            fo.write(fi.read())
+    with open(src, 'rb') as fi:
+        has_cr = False
+        if os.path.getsize(src):
+            with mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                has_cr = mm.find(b'\r') != -1
+    if not has_cr:
+        # nothing to convert, let the kernel copy it (sendfile on linux)
+        shutil.copyfile(src, dest)
+        return dest
+
+    with open(src, 'rb') as fi, open(dest, 'wb') as fo:
+        tail = b''
+        while chunk := fi.read(chunk_size):
+            chunk = tail + chunk
+            # a '\\r' at the end may be followed by '\\n' in the next chunk
+            tail = b''
+            if chunk.endswith(b'\r'):
+                chunk, tail = chunk[:-1], b'\r'
+            fo.write(chunk.replace(b'\r\n', b'\n'))
+        fo.write(tail)
+    return dest
+
 
+def replace(src: str, s: str, r: str, dest=None,
+            max_bulk_bytes=64*1024*1024, chunk_size=1 << 20):
+    """Replace every `s` with `r` in a file, writing the result to `dest`.
+    Files up to `max_bulk_bytes` are replaced in one `str.replace()`,
+    bigger ones `chunk_size` characters at a time.
 
-def replace(src: str, s: str, r: str, dest=None):
+    Example:
+        >>> from trz_py_utils.file import replace, read_file
+        >>> src = "/tmp/replace_example"
+        >>> with open(src, "w") as f:
+        ...     _ = f.write("a~NULL~b\\nc~NULL~d\\n")
+        >>> read_file(replace(src, "~NULL~", "~~"))
+        'a~~b\\nc~~d\\n'
+        >>> # matches split across chunks are still replaced
+        >>> read_file(replace(src, "~NULL~", "~~", max_bulk_bytes=0, chunk_size=4))
+        'a~~b\\nc~~d\\n'
+    """  # noqa
     dest = dest or f"/tmp/{uuid4()}"
-    with open(src, "r") as fi:
-        with open(dest, "w", newline="\n") as fo:
-            for li in fi.readlines():
-                fo.write(li.replace(s, r) if s in li else li)
+    with open(src, "r", buffering=IO_BUFFER_BYTES) as fi:
+        with open(dest, "w", newline="\n", buffering=IO_BUFFER_BYTES) as fo:
+            if os.path.getsize(src) <= max_bulk_bytes:
+                fo.write(fi.read().replace(s, r))
+                return dest
+
+            # hold back a tail that could be the start of a split match
+            keep = len(s) - 1
+            pending = ""
+            while chunk := fi.read(chunk_size):
+                *parts, last = (pending + chunk).split(s)
+                split_at = max(len(last) - keep, 0)
+                if parts:
+                    fo.write(r.join(parts) + r)
+                fo.write(last[:split_at])
+                pending = last[split_at:]
+            fo.write(pending)
     return dest
 
 
+def detect_encoding(path: str, max_bytes: int = 4*1024*1024):
+    """Guess the encoding of a file from (at most) its first `max_bytes`,
+    using charset-normalizer on a slice of the memory-mapped file.
+
+    Args:
+        path (str): filepath to detect encoding of
+        max_bytes (int, optional): bytes to sample. Defaults to 4MB.
+
+    Returns:
+        str | None: python codec name, eg. 'utf_8'
+
+    Example:
+        >>> from trz_py_utils.file import detect_encoding
+        >>> path = "/tmp/detect_encoding"
+        >>> with open(path, 'w', encoding="utf-8") as f:
+        ...     _ = f.write("hello wörld ¿ fine")
+        >>> detect_encoding(path)
+        'utf_8'
+    """
+    if not os.path.getsize(path):
+        return None
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            best = from_bytes(mm[:max_bytes]).best()
+    return best.encoding if best else None
+
+
 def utf8_encode(src: str, dest=None):
-    dest = dest or f"{src}.utf8"
-    with open(dest, "w") as fo:
-        fo.write(str(from_path(src).best()))
+    """Re-encode `src` to utf-8, decoding strictly with the encoding detected
+    from its first 4MB, then from the whole file if that guess fails later on.
 
+    Raises:
+        UnicodeDecodeError: if `src` can't be decoded with either guess
+
+    Example:
+        >>> from trz_py_utils.file import utf8_encode
+        >>> path = "/tmp/utf8_encode"
+        >>> with open(path, 'w', encoding="cp1252") as f:
+        ...     for i in range(300_000):  # plain ascii past the first 4MB
+        ...         _ = f.write(f"row {i}~value {i}\\n")
+        ...     _ = f.write("Grüße aus Köln\\n")
+        >>> with open(utf8_encode(path), encoding="utf-8") as f:
+        ...     f.readlines()[-1]
+        'Grüße aus Köln\\n'
+    """
+    dest = dest or f"{src}.utf8"
+    encoding = detect_encoding(src) or "utf_8"
+    try:
+        return _copy_to_utf8(src, dest, encoding)
+    except UnicodeDecodeError as e:
+        size = os.path.getsize(src)
+        full = detect_encoding(src, max_bytes=size) or "utf_8"
+        if full == encoding:
+            raise
+        log.warning("%s: %s, re-detected %s over all %d bytes",
+                    src, e, full, size)
+        return _copy_to_utf8(src, dest, full)
+
+
+def _copy_to_utf8(src: str, dest: str, encoding: str) -> str:
+    log.info("re-encoding '%s' from %s to utf-8...", src, encoding)
+    try:
+        with open(src, "r", encoding=encoding, errors="strict",
+                  buffering=IO_BUFFER_BYTES) as fi:
+            with open(dest, "w", encoding="utf-8",
+                      buffering=IO_BUFFER_BYTES) as fo:
+                shutil.copyfileobj(fi, fo, 1 << 20)
+    except UnicodeDecodeError:
+        os.remove(dest)  # rather than leave half a file behind
+        raise
     return dest
 
 
+@lru_cache(maxsize=32)
+def _is_byte_splittable(encoding: str) -> bool:
+    """Whether text in `encoding` can be split into lines on b"\\n" bytes and
+    each line decoded on its own, ie. its newlines are those single bytes
+    and it has no BOM (eg. ascii, latin-1, utf-8, not utf-16 or utf-8-sig).
+
+    Example:
+        >>> from trz_py_utils.file import _is_byte_splittable
+        >>> _is_byte_splittable("utf-8"), _is_byte_splittable("latin-1")
+        (True, True)
+        >>> _is_byte_splittable("utf-16"), _is_byte_splittable("utf-8-sig")
+        (False, False)
+    """
+    try:
+        return "\r\n".encode(encoding) == b"\r\n"
+    except LookupError:
+        return False  # left for open() to raise
+
+
 class BadLine:
     """Handles operations on lines containing non-utf8 characters.
     """
@@ -84,23 +259,41 @@ class BadLine:
         self.line = line
         self.delimiter = delimiter or r"\t"
 
-    def peak_bad_char(self, offset=4, mode="r"):
-        position_start = int(self.position) - offset
-        position_end = self._seek_until_newline(position_start)
-        with open(self.path, mode) as file:
+    def peak_bad_char(self, offset=4, mode="r", window=256):
+        position_start = max(int(self.position) - offset, 0)
+        # position is a byte offset, and the character there won't decode,
+        # so read one small window as bytes and decode it just for display
+        with open(self.path, "rb") as file:
             file.seek(position_start)
-            rest = file.read(position_end - position_start)
-            log.info(rest)
-            log.info(f"{' '*(offset+2)}^")
-
-    def _seek_until_newline(self, position: int):
-        with open(self.path, 'r') as file:
+            rest = file.read(window)
+        # only show the line the bad character is on
+        i_bad = int(self.position) - position_start
+        start = rest.rfind(b"\n", 0, i_bad) + 1
+        end = rest.find(b"\n", i_bad)
+        rest = rest[start:end] if end != -1 else rest[start:]
+        before = rest[:i_bad - start]
+        if "b" in mode:
+            pad = len(repr(before)) - 1  # b'... is logged as its repr
+        else:
+            rest = rest.decode(errors="backslashreplace")
+            pad = len(before.decode(errors="backslashreplace"))
+        log.info(rest)
+        log.info(f"{' '*pad}^")
+
+    def _seek_until_newline(self, position: int, block_size=65536):
+        """byte position just past the next newline (or EOF) from position.
+        """
+        with open(self.path, 'rb', buffering=0) as file:
             file.seek(position)
+            read_so_far = 0
             while True:
-                char = file.read(1)
-                if not char or char == '\n':
-                    break
-            return file.tell()
+                chunk = file.read(block_size)
+                if not chunk:
+                    return position + read_so_far
+                idx = chunk.find(b'\n')
+                if idx != -1:
+                    return position + read_so_far + idx + 1
+                read_so_far += len(chunk)
 
     def _substr_between(self, s: str, start: str, end: str):
         start_index = s.find(start)
@@ -112,6 +305,9 @@ class BadLine:
     def _i_pos_from_error(self, e: UnicodeDecodeError):
         if not e:
             return None
+        if isinstance(e, UnicodeDecodeError):
+            # the message may have a range, eg. "bytes in position 4-5"
+            return e.start
         if "position" not in str(e):
             log.error("failed to get byte position from error")
             return None
@@ -133,20 +329,24 @@ class BadLine:
             >>> bad_line.caret_under_matches()
             ['line 1: 09BBÂ¿~NY~1G', '            ^^', " (re pattern '[^\\\\x00-\\\\x7F]')"]
         """  # noqa
-        caret_line = [' '] * len(self.line)
+        # one buffer of ascii bytes, rather than a str object per character
+        caret_line = bytearray(b' ' * len(self.line))
         preface = f"line {self.line_no}: "
         pl = len(preface)
 
         for m in self.re_matches:
             start, end = m.span()
-            caret_line[start+pl:end+pl] = ['^'] * (end - start)
+            caret_line[start+pl:end+pl] = b'^' * (end - start)
 
-        lines = [preface+self.line, ''.join(caret_line)]
+        lines = [preface+self.line, caret_line.decode('ascii')]
         lines.append(f" (re pattern '{m.re.pattern}')")
 
         return lines
 
     def print(self):
+        # building the caret lines costs more than logging them
+        if not log.getLogger().isEnabledFor(log.INFO):
+            return
         _ = [log.info(line) for line in self.caret_under_matches()]
 
     def count_cols(self):
@@ -192,7 +392,7 @@ class BadFileReader:
         self.i_pos = i_pos
         self._mode = mode
         self.path = path
-        self._i = 0
+        self._i = None  # lines seen by read(), counted lazily before that
         self.bad_lines: list[BadLine] = []
         self.lines: list[str] = []
         self.replace = f"{delimiter}{replace}{delimiter}"
@@ -201,19 +401,26 @@ class BadFileReader:
         self.delim = delimiter
         self.set_regex()
 
-        # count lines
-        log.info("counting lines...")
-        self.num_total = sum(1 for _ in open(self.path, mode=mode, **kwargs))
-        log.info(f"{self.num_total} total lines.")
-
-        # read headers
-        with open(path, mode=mode, **kwargs) as file:
-            log.info(f"getting headers from first row of '{path}'...")
-            self.headers = self._headers(file)
-            self.ncols = len(self.headers)
-
-    def _headers(self, file: TextIOWrapper, delim: str = None):
-        row = file.readline().strip()
+        # progress is tracked by bytes, so lines needn't be counted up-front
+        self.num_total_bytes = os.path.getsize(self.path)
+        log.info(f"{sizeof_fmt(self.num_total_bytes)} total.")
+
+        log.info(f"getting headers from first row of '{path}'...")
+        encoding = kwargs.get("encoding") or locale.getpreferredencoding(False)
+        if _is_byte_splittable(encoding):
+            # a binary readline() stops at the first newline, instead of
+            # decoding a whole text buffer of the file
+            errors = kwargs.get("errors") or "strict"
+            with open(path, "rb") as file:
+                row = file.readline().decode(encoding, errors)
+        else:
+            with open(path, mode=mode, **kwargs) as file:
+                row = file.readline()
+        self.headers = self._headers(row)
+        self.ncols = len(self.headers)
+
+    def _headers(self, row: str, delim: str = None):
+        row = row.strip()
 
         log.info(f"parsing header row using delim {delim or self.delim}")
 
@@ -226,13 +433,15 @@ class BadFileReader:
             log.warn(f"no delim {delim or self.delim} found in {row}")
 
         headers = row.split(delim or self.delim)
-        log.info(f"found {len(headers)} headers:")
-        log.info(json.dumps(headers, indent=4))
+        log.info("found %d headers:", len(headers))
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info(json.dumps(headers, indent=4))
 
         return headers
 
     def encoding(self, bytes_scan_encoding: int = 1024*1024):
-        """Uses subshell command `file` with `-i` option to get encoding.
+        """Gets encoding from libmagic (same engine as `file -i`), through
+        python-magic if it's installed, else running `file` itself.
 
         Args:
             bytes_scan_encoding (int, optional): number of bytes
@@ -244,13 +453,40 @@ class BadFileReader:
 
         Returns:
             str | None: encoding of the file.
+
+        Example:
+            >>> from trz_py_utils.file import BadFileReader
+            >>> src = '/tmp/example'
+            >>> with open(src, "w") as f:
+            ...     _ = f.write("hello~world")
+            >>> BadFileReader(src).encoding()
+            'us-ascii'
         """
         b = bytes_scan_encoding
-        cmd = f"file -v; file '{self.path}' -i -P encoding=${b}"
+        encoding = self._encoding_libmagic(b) if magic else None
+        if encoding is None:
+            encoding = self._encoding_subprocess(b)
+        if encoding == "us-ascii":
+            log.warn("'us-ascii' won't work with `open()`, use 'latin-1'")
+
+        return encoding
+
+    def _encoding_libmagic(self, bytes_scan_encoding: int):
+        # in-process, so no fork/exec and no shell quoting of the path
+        try:
+            m = magic.Magic(mime_encoding=True)
+            m.setparam(magic.MAGIC_PARAM_ENCODING_MAX, bytes_scan_encoding)
+            return m.from_file(self.path)
+        except Exception as e:
+            log.error(f"ERROR: failed to get encoding from libmagic:\n{e}")
+            return None
+
+    def _encoding_subprocess(self, bytes_scan_encoding: int):
+        b = bytes_scan_encoding
+        cmd = ["file", "-i", "-P", f"encoding={b}", self.path]
         try:
             result = subprocess.run(
                 cmd,
-                shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True)
@@ -258,45 +494,177 @@ class BadFileReader:
             if result.stderr and result.returncode != 0:
                 raise ChildProcessError(result.stderr)
         except Exception as e:
-            log.error(f"ERROR: failed to run `file` in subshell:\n{e}")
+            log.error(f"ERROR: failed to run `file` in subprocess:\n{e}")
             return None
 
-        encoding = result.stdout.split("charset=")[-1].strip()
-        if encoding == "us-ascii":
-            log.warn("'us-ascii' won't work with `open()`, use 'latin-1'")
+        return result.stdout.split("charset=")[-1].strip()
 
-        return encoding
-        # return result.stdout
+    @property
+    def num_total(self):
+        """number of lines seen by the last `read()`, or in the whole file
+        if it hasn't been read yet.
 
-    def _yield_lines(self, **kwargs):
+        Example:
+            >>> from trz_py_utils.file import BadFileReader
+            >>> src = '/tmp/example'
+            >>> with open(src, "w") as f:
+            ...     _ = f.write("HEADER1~HEADER2\\nvalue1~value2")
+            >>> BadFileReader(src).num_total
+            2
+            >>> with open(src, "w", encoding="utf-16") as f:
+            ...     _ = f.write("HEADER1~HEADER2\\nvalue1~value2\\n")
+            >>> BadFileReader(src, encoding="utf-16").num_total
+            2
+        """
+        if self._i is None:
+            self._i = self._count_lines()
+        return self._i
+
+    def _count_lines(self):
+        if not self.num_total_bytes:
+            return 0
+        encoding = self._kwargs.get("encoding") \
+            or locale.getpreferredencoding(False)
+        if not _is_byte_splittable(encoding):
+            # its newlines aren't b"\n" bytes, so let open() find them
+            with open(self.path, mode=self._mode, **self._kwargs) as f:
+                return sum(1 for _ in f)
+        # count newlines in big binary blocks instead of iterating over lines
+        n, block = 0, b""
+        with open(self.path, "rb", buffering=0) as f:
+            while chunk := f.read(READ_CHUNK_BYTES):
+                n += chunk.count(b"\n")
+                block = chunk
+        return n if block.endswith(b"\n") else n + 1
+
+    def _yield_lines(self, chunk_size=READ_CHUNK_BYTES, **kwargs):
         kwargs["mode"] = kwargs.get("mode", self._mode)
-        log.info(f"using options for read():\n{json.dumps(kwargs, indent=4)}")
-        with open(self.path, **kwargs) as file:
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info("using options for read():\n%s",
+                     json.dumps(kwargs, indent=4))
+        # lines are split as bytes, and only decoded if they aren't ascii
+        encoding = kwargs.get("encoding") or locale.getpreferredencoding(False)
+        if not _is_byte_splittable(encoding):
+            yield from self._yield_text_lines(**kwargs)
+            return
+        errors = kwargs.get("errors") or "strict"
+        buffering = kwargs.get("buffering", -1)
+        # local names for everything touched per line, skips attribute lookups
+        is_ascii_only = self._is_ascii_only
+        find, repl = self._replace_bytes, self._replace_with_bytes
+        # whole chunks of ascii can be replaced and decoded in one go,
+        # as long as `replace` can't span a line break
+        bulk_ok = is_ascii_only and not (b"\n" in find or b"\r" in find)
+        parse_line = self._parse_line
+        add_bad_line = self.bad_lines.append
+        i = self._i = 0
+        with open(self.path, "rb", buffering=buffering) as file:
             opts = {
-                "total": self.num_total,
-                "unit": 'line',
+                "total": self.num_total_bytes,
+                "unit": 'B',
                 "desc": "reading lines",
             }
             with enlighten.get_manager().counter(**opts) as pbar:
+                n_bytes = 0  # progress not yet sent to pbar
+                offset = 0  # byte position of the current line
+                pending = b""  # last line of a chunk, may continue in next
+                try:
+                    while True:
+                        chunk = file.read(chunk_size)
+                        data = pending + chunk
+                        if bulk_ok and data.isascii() and b"\r" not in data:
+                            # split after the last newline, keep the rest
+                            cut = data.rfind(b"\n") + 1 if chunk else len(data)
+                            pending = data[cut:]
+                            text = data[:cut].replace(find, repl)
+                            parts = text.decode("ascii").split("\n") \
+                                if text else []
+                            if text.endswith(b"\n"):
+                                parts.pop()  # nothing after the last newline
+                            i += len(parts)
+                            offset += cut
+                            pbar.update(n_bytes + cut)
+                            n_bytes = 0
+                            yield from filter(None, parts)
+                            if not chunk:
+                                break  # End of file reached
+                            continue
+                        lines = data.splitlines(keepends=True)
+                        pending = lines.pop() if chunk and lines else b""
+                        for raw in lines:
+                            i += 1
+                            n_bytes += len(raw)
+                            if not i % PBAR_EVERY:
+                                pbar.update(n_bytes)
+                                n_bytes = 0
+                            line = raw.rstrip(b"\r\n")
+                            try:
+                                if is_ascii_only and line.isascii():
+                                    # nothing the regex could match
+                                    good_line = line.replace(
+                                        find, repl).decode("ascii")
+                                else:
+                                    self._i = i  # for BadLine.line_no
+                                    good_line = parse_line(
+                                        line.decode(encoding, errors), file)
+                                if good_line:
+                                    yield good_line
+                            except UnicodeDecodeError as e:
+                                log.error("ERROR: line %d: %s", i, e)
+                                bl = BadLine(file.name, e, line_no=i)
+                                bl.position = offset + e.start
+                                add_bad_line(bl)
+                            except Exception as e:
+                                log.error("ERROR: line %d: %s", i, e)
+                            offset += len(raw)
+                        if not chunk:
+                            pbar.update(n_bytes)
+                            break  # End of file reached
+                finally:
+                    self._i = i
+
+    def _yield_text_lines(self, **kwargs):
+        """_yield_lines() decoded by open() in text mode, for codecs whose
+        lines can't be split as bytes (see _is_byte_splittable())."""
+        opts = {"unit": 'line', "desc": "reading lines"}
+        i = self._i = 0
+        with open(self.path, **kwargs) as file, \
+                enlighten.get_manager().counter(**opts) as pbar:
+            try:
                 while True:
                     try:
-                        self._i += 1
-                        pbar.update(1)
-                        good_line = self._parse_line(
-                            line=next(file).strip("\n"), file=file)
-                        if good_line:
-                            yield good_line
+                        line = next(file)
                     except StopIteration:
                         break  # End of file reached
                     except UnicodeDecodeError as e:
-                        log.error(f"ERROR: line {self._i}: {e}")
-                        self.bad_lines.append(BadLine(file, e))
+                        i += 1
+                        log.error("ERROR: line %d: %s", i, e)
+                        self.bad_lines.append(
+                            BadLine(file.name, e, line_no=i))
+                        continue
+                    i += 1
+                    if not i % PBAR_EVERY:
+                        pbar.update(PBAR_EVERY)
+                    self._i = i  # for BadLine.line_no
+                    try:
+                        good_line = self._parse_line(line.rstrip("\r\n"),
+                                                     file)
                     except Exception as e:
-                        log.error(f"ERROR: line {self._i}: {e}")
+                        log.error("ERROR: line %d: %s", i, e)
+                        continue
+                    if good_line:
+                        yield good_line
+                pbar.update(i % PBAR_EVERY)
+            finally:
+                self._i = i
 
     def _parse_line(self, line: str, file):
         # filter out lines containing non-ascii characters
-        matches_bad = list(re.finditer(self.re_bad, line))
+        if self._is_ascii_only:
+            pass  # ascii lines never get here, so the scan below would match
+        elif not self._re_scan.search(line):
+            return line  # one scan found neither a bad match nor `replace`
+        matches_bad = list(self._re_bad.finditer(line))
         if matches_bad:
             bl = BadLine(path=file.name,
                          error=None,
@@ -310,13 +678,12 @@ class BadFileReader:
             self.bad_lines.append(bl)
             return None
 
-        # replace substring if found
-        if self.replace in line:
-            line = line.replace(self.replace, self.replace_with)
+        # str.replace() returns the line itself when there's nothing to replace
+        line = line.replace(self.replace, self.replace_with)
 
         return line
 
-    def set_regex(self, accept=[], reject=[r"[^\x00-\x7F]"]):
+    def set_regex(self, accept=[], reject=[RE_NON_ASCII]):
         """make regex patterns from list of line matches
 
         Args:
@@ -343,19 +710,29 @@ class BadFileReader:
             >>> bfr.set_regex(reject=filter_out)
             ('', '[^_]|^(?:[^~]*~){1,}[^~]*$')
         """  # noqa
-        log.info(f"setting regex for {self.path} to: ")
-        log.info(json.dumps(reject, indent=4))
+        log.info("setting regex for %s to: ", self.path)
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info(json.dumps(reject, indent=4))
         self.re_good = "|".join(accept)
         self.re_bad = "|".join(reject)
+        self._re_bad = re.compile(self.re_bad)
+        # lets clean lines be accepted in a single pass of the regex engine
+        self._re_scan = re.compile(f"{self.re_bad}|{re.escape(self.replace)}")
+        self._replace_bytes = self.replace.encode()
+        self._replace_with_bytes = self.replace_with.encode()
+        # only non-ascii is rejected, so str.isascii() can stand in for regex
+        self._is_ascii_only = self.re_bad == RE_NON_ASCII
 
         return self.re_good, self.re_bad
 
-    def read(self, **kwargs):
+    def read(self, keep_lines=True, **kwargs):
         """Read in a file. Sorts good and bad lines based on
         regex and UnicodeDecodeError. Replaces '~NULL~'
         with '~~' by default.
 
         Arguments:
+            keep_lines (bool, optional): store good lines in `self.lines`.
+                Pass False to only count them. Defaults to True.
             kwargs (optional): any arguments for `open()`.
 
         Example:
@@ -411,31 +788,137 @@ class BadFileReader:
             ['HEADER1', 'HEADER2', 'HEADER3']
             >>> bfr.lines[1]
             'value1\\tvalue2\\t'
+
+        Example:
+            >>> # eg. UTF-16, whose newlines aren't b"\\n", is read as text
+            >>> from trz_py_utils.file import BadFileReader
+            >>> src = '/tmp/example_utf16'
+            >>> with open(src, "w", encoding="utf-16") as f:
+            ...     _ = f.write("H1~H2\\nv1~NULL~\\nv3~v4\\n")
+            >>> bfr = BadFileReader(src, encoding="utf-16")
+            >>> bfr.headers
+            ['H1', 'H2']
+            >>> bfr.read(encoding="utf-16")
+            >>> bfr.lines
+            ['H1~H2', 'v1~~', 'v3~v4']
         """
         self.bad_lines = []
         self.lines = []
+        num_good = 0
         start_s = time.time()
         for line in self._yield_lines(**kwargs):
-            self.lines.append(line)
+            num_good += 1
+            if keep_lines:
+                self.lines.append(line)
         self.time_read_s = time.time() - start_s
-        self.num_good = len(self.lines)
+        self.num_good = num_good
         self.num_bad = len(self.bad_lines)
         log.info(f"found {self.num_bad} bad lines ()")
 
+    def read_to(self, dest: str, write_kwargs: dict = None, **kwargs):
+        """Like `read()` but streams good lines straight into `dest`
+        instead of keeping them in memory, so memory stays constant
+        regardless of file size.
+
+        Args:
+            dest (str): filepath to write good lines to.
+            write_kwargs (dict, optional): any arguments for `open()` of
+                `dest`, eg. `encoding`. Defaults to None.
+            kwargs (optional): any arguments for `open()` of the source.
+
+        Returns:
+            str: path to output file
+
+        Example:
+            >>> from trz_py_utils.file import BadFileReader
+            >>> src = '/tmp/example'
+            >>> with open(src, "w") as f:
+            ...     print("HEADER1~HEADER2", file=f)
+            ...     print("09BB¿~NY", file=f)
+            ...     print("value1~NULL~", file=f)
+            >>> bfr = BadFileReader(src)
+            >>> bfr.read_to("/tmp/example_out", encoding="latin-1")
+            '/tmp/example_out'
+            >>> bfr.lines
+            []
+            >>> bfr.num_good, bfr.num_bad
+            (2, 1)
+            >>> open("/tmp/example_out").read()
+            'HEADER1~HEADER2\\nvalue1~~\\n'
+            >>> bfr.read_to("/tmp/example_out", {"newline": "\\r\\n"})
+            '/tmp/example_out'
+            >>> open("/tmp/example_out", "rb").read()
+            b'HEADER1~HEADER2\\r\\nvalue1~~\\r\\n'
+        """
+        self.bad_lines = []
+        self.lines = []
+        num_good = 0
+        kwargs.setdefault("buffering", IO_BUFFER_BYTES)
+        start_s = time.time()
+        write_kwargs = {"mode": "w", "buffering": IO_BUFFER_BYTES,
+                        **(write_kwargs or {})}
+        with open(dest, **write_kwargs) as fo:
+            for line in self._yield_lines(**kwargs):
+                fo.write(f"{line}\n")
+                num_good += 1
+        self.time_read_s = time.time() - start_s
+        self.num_good = num_good
+        self.num_bad = len(self.bad_lines)
+        log.info(f"found {self.num_bad} bad lines ()")
+        log.info(f"wrote {num_good} lines to '{dest}'")
+
+        return dest
+
     def is_equal_columns_every_line(self, delim: str = None):
-        bad_lines = []
-        bad_lines_i = []
-        with open(self.path, self._mode) as fi:
-            n = fi.readline().count(delim or self.delim)
-            i = 2
-            for li in fi.readlines():
-                c = li.count(delim or self.delim)
-                if c != n:
-                    log.info(f"! line {i+1} has {c} when header has {n}")
-                    bad_lines.append(li)
-                    bad_lines_i.append(i)
+        """Whether every line has as many delimiters as the header,
+        stopping at the first line that doesn't.
+
+        Example:
+            >>> from trz_py_utils.file import BadFileReader
+            >>> with open("/tmp/cols.txt", "w") as f:
+            ...     f.write("A~B\\n1~2\\n3~4\\n")
+            >>> BadFileReader("/tmp/cols.txt").is_equal_columns_every_line()
+            True
+            >>> with open("/tmp/cols.txt", "a") as f:
+            ...     f.write("5~6~7\\n")
+            >>> BadFileReader("/tmp/cols.txt").is_equal_columns_every_line()
+            False
+        """
+        if not os.path.getsize(self.path):
+            return True
+        encoding = self._kwargs.get("encoding") \
+            or locale.getpreferredencoding(False)
+        if not _is_byte_splittable(encoding):
+            return self._is_equal_columns_text(delim or self.delim)
+        sep = (delim or self.delim).encode(encoding)
+        # count separators on raw bytes, one C-level count per line
+        with open(self.path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            nl = mm.find(b"\n")
+            n = mm[:size if nl == -1 else nl].count(sep)
+            i = 1
+            while nl != -1 and nl + 1 < size:
+                start = nl + 1
+                nl = mm.find(b"\n", start)
+                c = mm[start:size if nl == -1 else nl].count(sep)
                 i += 1
-        return len(bad_lines_i) < 1
+                if c != n:
+                    log.info(f"! line {i} has {c} when header has {n}")
+                    return False
+        return True
+
+    def _is_equal_columns_text(self, delim: str):
+        """is_equal_columns_every_line() on lines from a text-mode open(),
+        for codecs whose lines can't be split as bytes."""
+        with open(self.path, mode=self._mode, **self._kwargs) as f:
+            n = next(f).rstrip("\r\n").count(delim)
+            for i, line in enumerate(f, start=2):
+                c = line.rstrip("\r\n").count(delim)
+                if c != n:
+                    log.info(f"! line {i} has {c} when header has {n}")
+                    return False
+        return True
 
     def write(self, dest: str = f"/tmp/{uuid4()}",
               lines: list[str] = None, **kwargs):
@@ -463,6 +946,7 @@ class BadFileReader:
         """
         log.info("calculating satistics...")
         kwargs["mode"] = kwargs.get("mode", "w")
+        kwargs.setdefault("buffering", IO_BUFFER_BYTES)
 
         n_lines = len(lines) if lines else self.num_good
         n_total = self.num_total
@@ -470,9 +954,10 @@ class BadFileReader:
         n_bad = n_total - n_lines
         self.percent_good = pct = 100*n_lines / n_total
 
-        log.info(f"writing '{dest}'")
-        log.info(f"{n_lines} lines ({n_total} - {n_bad}) ({percent(pct)})")
-        log.info(f"with options:\n{json.dumps(kwargs, indent=4)}")
+        log.info("writing '%s'", dest)
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info(f"{n_lines} lines ({n_total} - {n_bad}) ({percent(pct)})")
+            log.info(f"with options:\n{json.dumps(kwargs, indent=4)}")
 
         if kwargs.pop("dry_run", ""):
             log.info("skipping write (dry_run=True)")
@@ -487,9 +972,12 @@ class BadFileReader:
         start_s = time.time()
         with enlighten.get_manager().counter(**opts) as pbar:
             with open(dest, **kwargs) as fo:
-                for line in lines:
-                    fo.write(f"{line}\n")
-                    pbar.update(1)
+                # one write() per batch of lines, instead of one per line
+                iter_lines = iter(lines)
+                while batch := list(islice(iter_lines, PBAR_EVERY)):
+                    fo.write("\n".join(batch))
+                    fo.write("\n")
+                    pbar.update(len(batch))
         self.time_write_s = time.time() - start_s
         return dest
 
@@ -510,5 +998,14 @@ class BadFileReader:
 
 
 def tmp_path(ext: str = None):
+    """A new path in /tmp, unique per call.
+
+    Example:
+        >>> from trz_py_utils.file import tmp_path
+        >>> tmp_path("png").endswith(".png"), tmp_path() != tmp_path()
+        (True, True)
+        >>> tmp_path().startswith("/tmp/") and "None" not in tmp_path()
+        True
+    """
     ext = f".{ext}" if ext and "." not in ext else ext
-    return f"/tmp/{uuid4()}{ext}"
+    return f"/tmp/{uuid4()}{ext or ''}"
@@ -1,6 +1,11 @@
 from typing import Any, Iterable
 from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 import jsonpickle
+import math
+
+
+SIZE_UNITS = ("", "K", "M", "G", "T", "P", "E", "Z")
 
 
 def sizeof_fmt(num: int | float, suffix="B"):
@@ -23,11 +28,14 @@ def sizeof_fmt(num: int | float, suffix="B"):
         >>> sizeof_fmt(5*1024*1024)
         '5.0MB'
     """
-    for unit in ("", "K", "M", "G", "T", "P", "E", "Z"):
-        if abs(num) < 1024.0:
-            return f"{num:3.1f}{unit}{suffix}"
-        num /= 1024.0
-    return f"{num:.1f}Yi{suffix}"
+    # every unit is 2**10 bigger, so the bit length picks it directly
+    n = float(abs(num))
+    bits = int(n).bit_length() if math.isfinite(n) else 90
+    i = min(max(bits - 1, 0) // 10, 8)
+    num /= 1 << (10 * i)
+    if i == 8:
+        return f"{num:.1f}Yi{suffix}"
+    return f"{num:3.1f}{SIZE_UNITS[i]}{suffix}"
 
 
 def unique(iterable: Iterable):
@@ -49,20 +57,34 @@ def unique(iterable: Iterable):
         >>> from trz_py_utils.fmt import unique
         >>> unique(["It", "was", "it", "was"])
         ['It', 'was', 'it']
+
+    Example:
+        >>> from trz_py_utils.fmt import unique
+        >>> unique([[1], [1], [2]])
+        [[1], [2]]
     """
+    values = list(iterable)
+    try:
+        # dicts keep insertion order, and hashing makes this O(N)
+        return list(dict.fromkeys(values))
+    except TypeError:
+        pass  # unhashable values, eg. lists or dicts
     values_seen_so_far = []
-    for this_value in iterable:
+    for this_value in values:
         if this_value not in values_seen_so_far:
             values_seen_so_far.append(this_value)
     return values_seen_so_far
 
 
-def percent(value: int | str | float, precision='0.00001'):
+def percent(value: int | str | float, precision='0.00001', exact=False):
     """_summary_
 
     Args:
         value (int|str|float): _description_
         precision (str, optional): _description_. Defaults to '0.00001'.
+        exact (bool, optional): quantize with `Decimal` and ROUND_HALF_UP.
+            Otherwise numbers are formatted as floats, which rounds exact
+            ties to even. Strings are always quantized. Defaults to False.
 
     Returns:
         str: formatted percent, eg. "99.9999%"
@@ -71,13 +93,30 @@ def percent(value: int | str | float, precision='0.00001'):
         >>> from trz_py_utils.fmt import percent
         >>> percent(99.9999)
         '99.99990%'
+
+    Example:
+        >>> from trz_py_utils.fmt import percent
+        >>> percent(0.015625, exact=True), percent(0.015625)
+        ('0.01563%', '0.01562%')
     """
+    digits = _decimal_places(precision)
+    if not exact and digits is not None and isinstance(value, (int, float)):
+        return f"{value:.{digits}f}%"
     percent = Decimal(value).quantize(
         Decimal(precision),
         rounding=ROUND_HALF_UP)
     return f"{percent}%"
 
 
+@lru_cache(maxsize=32)
+def _decimal_places(precision: str):
+    """digits after the point if precision is like '1' or '0.001'."""
+    _, digits, exponent = Decimal(precision).as_tuple()
+    if digits != (1,) or exponent > 0:
+        return None
+    return -exponent
+
+
 def dumps(object: Any, indent=4, **kwargs):
     """json.dumps() but skips non-primitives keys AND values
 
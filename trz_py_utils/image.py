@@ -1,8 +1,13 @@
 import random
 import io
 from PIL import Image, ImageDraw, ImageFont
-import pkg_resources
 import logging as log
+from functools import lru_cache
+from importlib.resources import files
+
+
+# font shipped with the package, resolved once instead of per get_font()
+SHIP_FONT_PATH = str(files("trz_py_utils").joinpath("fonts/Futura.ttc"))
 
 
 def show_bounding_boxes(image_bytes, box_sets, colors):
@@ -15,25 +20,28 @@ def show_bounding_boxes(image_bytes, box_sets, colors):
     """
     image = Image.open(io.BytesIO(image_bytes))
     draw = ImageDraw.Draw(image)
+    W, H = image.size
     for boxes, color in zip(box_sets, colors):
         for box in boxes:
-            left = image.width * box["Left"]
-            top = image.height * box["Top"]
-            right = (image.width * box["Width"]) + left
-            bottom = (image.height * box["Height"]) + top
+            left = W * box["Left"]
+            top = H * box["Top"]
+            right = (W * box["Width"]) + left
+            bottom = (H * box["Height"]) + top
             draw.rectangle([left, top, right, bottom], outline=color, width=3)
     image.show()
 
 
 def draw_polygons(img: Image.Image,
                   polygons: list[list[dict[str, int]]],
-                  color, width=1):
+                  color, width=1,
+                  drawer: ImageDraw.ImageDraw = None):
     """
     Draws polygons on an image and shows it with the default image viewer.
 
     :param image_bytes: The image to draw, as bytes.
     :param polygons: The list of polygons to draw on the image.
     :param color: The color to use to draw the polygons.
+    :param drawer: ImageDraw.Draw(img) to reuse, made if not given.
 
     Example:
         >>> # compare this image with saved test image
@@ -52,9 +60,10 @@ def draw_polygons(img: Image.Image,
         >>> # compare exiting and generated
         >>> ImageChops.difference(Image.open(p1), Image.open(p2)).getbbox()
     """  # noqa
-    draw = ImageDraw.Draw(img)
+    draw = drawer or ImageDraw.Draw(img)
+    W, H = img.size
     for polygon in polygons:
-        xys = [(img.width * pt["X"], img.height * pt["Y"]) for pt in polygon]
+        xys = [(W * pt["X"], H * pt["Y"]) for pt in polygon]
         draw.polygon(xys, outline=color, width=width)
     return img
 
@@ -78,6 +87,7 @@ def pick_color(i: int = None):
 
 def get_font(size=10, path: str = None, name="menlo"):
     """Cross-platform search for preferred font, or default font.
+    Fonts are cached by path and size, so repeat calls don't reload them.
 
     Args:
         size (int, optional): font size. Defaults to 10.
@@ -85,22 +95,36 @@ def get_font(size=10, path: str = None, name="menlo"):
 
     Returns:
         _type_: _description_
+
+    Example:
+        >>> from trz_py_utils.image import get_font
+        >>> get_font(12) is get_font(12)
+        True
     """
-    # Replace 'your_package' with the actual name of your package
-    root_dir = "trz_py_utils"
-    font_relative = "fonts/Menlo-Regular.ttf"
-    font_relative = "fonts/Futura.ttc"
-    ship_path = pkg_resources.resource_filename(root_dir, font_relative)
-    for font_path in [path, ship_path, "Supplemental/Futura.ttc"]:
+    for font_path in [path, SHIP_FONT_PATH, "Supplemental/Futura.ttc"]:
         if not font_path:
             continue
-        try:
-            log.info(f"trying to open {font_path}")
-            return ImageFont.truetype(font_path, size=size)
-        except IOError as e:
-            log.info(f"failed to get font: {e}")
-            pass
+        font = _load_font(font_path, size)
+        if font:
+            return font
     # Use a default font if Arial Unicode MS is not available
+    return _load_default_font(size)
+
+
+@lru_cache(maxsize=256)
+def _load_font(font_path: str, size: int):
+    """ImageFont.truetype() reads the font from disk, so only do it once.
+    Failures are cached too (as None), so missing fonts aren't retried."""
+    try:
+        log.info(f"trying to open {font_path}")
+        return ImageFont.truetype(font_path, size=size)
+    except IOError as e:
+        log.info(f"failed to get font: {e}")
+        return None
+
+
+@lru_cache(maxsize=256)
+def _load_default_font(size: int):
     return ImageFont.load_default(size)
 
 
@@ -108,15 +132,67 @@ def find_font_to_fit_width(text: str,
                            width: int,
                            min_size=20,
                            max_size=200,
-                           drawer: ImageDraw.ImageDraw = None):
+                           drawer: ImageDraw.ImageDraw = None,
+                           bisect=False,
+                           step: int = 1):
+    """Biggest font (at least `min_size`) that fits `text` in `width` pixels.
+
+    Text width grows about linearly with font size, so the size is scaled
+    from one measurement at `max_size`, then stepped down while too wide.
+    `bisect=True` uses the older binary search over sizes instead.
+    Sizes are rounded down to a multiple of `step`, so texts of similar
+    widths share the same (cached) font.
+
+    Example:
+        >>> from trz_py_utils.image import find_font_to_fit_width
+        >>> from PIL import Image, ImageDraw
+        >>> drawer = ImageDraw.Draw(Image.new("RGB", (100, 100)))
+        >>> font = find_font_to_fit_width("Truck", 50, 5, 40, drawer)
+        >>> drawer.textlength("Truck", font=font) <= 50
+        True
+        >>> find_font_to_fit_width("Truck", 50, 5, 40, drawer, step=4).size % 4
+        0
+    """
     drawer = drawer or ImageDraw.Draw(Image.new("RGB", (width, max_size)))
+    if bisect or "\n" in text:  # textlength() can't measure multiline
+        return _bisect_font_to_fit_width(text, width, min_size, max_size,
+                                         drawer)
+
+    text_width = drawer.textlength(text, font=get_font(max_size))
+    font_size = int(max_size * width / max(text_width, 1))
+    font_size = max(min_size, min(max_size, font_size))
+    font_size = max(min_size, font_size - font_size % step)
+    font = get_font(font_size)
+
+    # scaling isn't exact (hinting, kerning), shrink until it fits
+    while font_size > min_size:
+        text_width = drawer.textlength(text, font=font)
+        if text_width <= width:
+            break
+        font_size = min(font_size - 1, int(font_size * width / text_width))
+        font_size = max(min_size, font_size - font_size % step)
+        font = get_font(font_size)
+
+    return font
+
+
+def _bisect_font_to_fit_width(text: str,
+                              width: int,
+                              min_size: int,
+                              max_size: int,
+                              drawer: ImageDraw.ImageDraw):
     font_size = (min_size + max_size) // 2
     font = get_font(font_size)  # load from filepath or default
+    multiline = "\n" in text
 
     while max_size - min_size > 1:
         # Check if the text fits within the specified pixel width
-        textbbox = drawer.textbbox((0, 0), text, font=font)
-        text_width, _ = textbbox[2] - textbbox[0], textbbox[3] - textbbox[1]
+        # (textlength() is cheaper, but can't measure multiline text)
+        if multiline:
+            textbbox = drawer.textbbox((0, 0), text, font=font)
+            text_width = textbbox[2] - textbbox[0]
+        else:
+            text_width = drawer.textlength(text, font=font)
         if text_width <= width:
             min_size = font_size
         else:
@@ -141,6 +217,8 @@ def draw_text_by_pixel_width(img: Image.Image,
                              color="black",
                              min_font_as_percent_of_height=0.03,
                              max_font_as_percent_of_height=0.20,
+                             drawer: ImageDraw.ImageDraw = None,
+                             font_size_step: int = 1,
                              **kwargs):
     """Adds text to image with automatic font size to
     fit a certain pixel width. Uses a sort of binary search to find the font.
@@ -156,6 +234,8 @@ def draw_text_by_pixel_width(img: Image.Image,
         color (str, optional): _description_. Defaults to "black".
         min_font_as_percent_of_height (float, optional): _description_. Defaults to 0.02.
         max_font_as_percent_of_height (float, optional): _description_. Defaults to 0.10.
+        drawer (ImageDraw.ImageDraw, optional): ImageDraw.Draw(img) to reuse. Defaults to None.
+        font_size_step (int, optional): round font sizes down to a multiple of this. Defaults to 1.
       
     Example:
         >>> # compare newly-generated image to saved test image
@@ -180,8 +260,8 @@ def draw_text_by_pixel_width(img: Image.Image,
         ... )
         >>> ImageChops.difference(img1, img2).getbbox()
     """  # noqa
-    drawer = ImageDraw.Draw(img)
-    img_w, img_h = drawer.im.size
+    drawer = drawer or ImageDraw.Draw(img)
+    img_w, img_h = img.size
 
     # convert relative to pixels
     if isinstance(width, float):
@@ -192,7 +272,8 @@ def draw_text_by_pixel_width(img: Image.Image,
     min_size = round(img_h * min_font_as_percent_of_height)
     max_size = round(img_h * max_font_as_percent_of_height)
 
-    font = find_font_to_fit_width(text, width, min_size, max_size, drawer)
+    font = find_font_to_fit_width(text, width, min_size, max_size, drawer,
+                                  step=font_size_step)
 
     # Draw the main text on top
     drawer.text(xy=xy,
@@ -217,27 +298,28 @@ def bounding_box_to_polygon(bounding_box: dict[str, float]):
     Returns:
     - list: List of dictionaries representing a polygon with keys 'X' and 'Y'.
     """  # noqa
-    top = bounding_box['Top']
-    left = bounding_box['Left']
-    height = bounding_box['Height']
-    width = bounding_box['Width']
-
-    # Calculate other corners of the bounding box
-    top_right = (left + width, top)
-    bottom_left = (left, top + height)
-    bottom_right = (left + width, top + height)
+    left, top, right, bottom = _bounding_box_to_xyxy(bounding_box)
 
     # Construct the polygon as a list of dictionaries
     polygon = [
         {'X': left, 'Y': top},
-        {'X': top_right[0], 'Y': top_right[1]},
-        {'X': bottom_right[0], 'Y': bottom_right[1]},
-        {'X': bottom_left[0], 'Y': bottom_left[1]},
+        {'X': right, 'Y': top},
+        {'X': right, 'Y': bottom},
+        {'X': left, 'Y': bottom},
     ]
 
     return polygon
 
 
+def _bounding_box_to_xyxy(bounding_box: dict[str, float]):
+    """(left, top, right, bottom) corners of a bounding box."""
+    left = bounding_box['Left']
+    top = bounding_box['Top']
+    return (left, top,
+            left + bounding_box['Width'],
+            top + bounding_box['Height'])
+
+
 def draw_polygon_labels(img: Image.Image,
                         labels: list[str],
                         bboxs: list[dict[str, int | float]],
@@ -248,6 +330,8 @@ def draw_polygon_labels(img: Image.Image,
                         label_color: str = None,
                         bbox_color: str = None,
                         bbox_px: int = None,
+                        inplace: bool = False,
+                        font_size_step: int = 2,
                         **kwargs):
     """
 
@@ -264,6 +348,10 @@ def draw_polygon_labels(img: Image.Image,
         label_color (str, optional): _description_. Defaults to "black".
         bbox_color (str, optional): _description_. Defaults to "black".
         bbox_px (int, optional): _description_. Defaults to 3.
+        inplace (bool, optional): draw on ``img`` itself instead of a copy.
+            Defaults to False.
+        font_size_step (int, optional): round label font sizes down to a
+            multiple of this, so similar labels share one font. Defaults to 2.
         min_font_as_percent_of_height (float, optional): _description_. Defaults to 0.02.
         max_font_as_percent_of_height (float, optional): _description_. Defaults to 0.50.
 
@@ -273,25 +361,35 @@ def draw_polygon_labels(img: Image.Image,
     if len(labels) != len(bboxs):
         raise ValueError(f"{len(labels)} labels but {len(bboxs)} bboxs")
 
-    img = img.copy()
-
-    i = 0
-    for label, bbox in zip(labels, bboxs):
+    if not inplace:
+        img = img.copy()
+    # one Draw for every box and label, instead of one per helper call
+    drawer = ImageDraw.Draw(img)
+    W, H = img.size
+
+    # lay out every box and label first, then draw them in two passes so
+    # no box is drawn over an earlier label
+    boxes, texts = [], []
+    # boxes are all pixel coords or all percent coords, check the first one
+    pixel_mode = bool(bboxs) and all(
+        isinstance(bboxs[0][k], int)
+        for k in ("Top", "Left", "Width", "Height"))
+    for i, (label, bbox) in enumerate(zip(labels, bboxs)):
         # convert pixel coords to percent coords
-        if all([isinstance(v, int) for k, v in bbox.items()]):
+        if pixel_mode:
             bbox = {
-                "Top": bbox["Top"] / img.height,
-                "Left": bbox["Left"] / img.width,
-                "Width": bbox["Width"] / img.width,
-                "Height": bbox["Height"] / img.height,
+                "Top": bbox["Top"] / H,
+                "Left": bbox["Left"] / W,
+                "Width": bbox["Width"] / W,
+                "Height": bbox["Height"] / H,
             }
         bbox_w, bbox_h = bbox["Width"], bbox["Height"]
 
         # don't make text too small if skinny vertical rectangle
         label_w = label_width*bbox_h if bbox_w < bbox_h else label_width*bbox_w
-        label_area_px = (label_w*img.width)*(2*label_w*img.width)
+        label_area_px = (label_w*W)*(2*label_w*W)
 
-        bbox_area_px = bbox_w*bbox_h * img.width*img.height
+        bbox_area_px = bbox_w*bbox_h * W*H
         bbox_px = bbox_px or max(int(bbox_area_px / 140000), 1)
 
         if not outline_px:
@@ -300,34 +398,44 @@ def draw_polygon_labels(img: Image.Image,
         # based on line widths, adjust label xy
         x, y = bbox["Left"], bbox["Top"]
         if label_anchor[1] == "t":
-            y = bbox["Top"] + (outline_px+bbox_px)/img.height
+            y = bbox["Top"] + (outline_px+bbox_px)/H
         elif label_anchor[1] == "b":
-            y = bbox["Top"] - (outline_px)/img.height
+            y = bbox["Top"] - (outline_px)/H
         if label_anchor[0] == "l":
-            x = bbox["Left"] + (outline_px+bbox_px)/img.width
+            x = bbox["Left"] + (outline_px+bbox_px)/W
 
         color = pick_color(i)
-        img = draw_polygons(
-            img=img,
-            polygons=[bounding_box_to_polygon(bbox)],
-            color=bbox_color or color,
-            width=bbox_px,
-            )
-
-        img = draw_text_by_pixel_width(
+        # the 4 corners directly, skipping the polygon of dicts
+        # (draw.rectangle() rounds float corners differently)
+        left, top, right, bottom = _bounding_box_to_xyxy(bbox)
+        boxes.append((
+            [(W*left, H*top), (W*right, H*top),
+             (W*right, H*bottom), (W*left, H*bottom)],
+            bbox_color or color,
+            bbox_px,
+            ))
+        texts.append(dict(
             text=label,
             width=label_w,
-            img=img,
             xy=(x, y),
-            anchor=label_anchor,
             color=label_color or color,
-            outline_color=outline_color,
             outline_width=outline_px,
+            ))
+
+    for xys, color, px in boxes:
+        drawer.polygon(xys, outline=color, width=px)
+
+    for text in texts:
+        img = draw_text_by_pixel_width(
+            img=img,
+            anchor=label_anchor,
+            outline_color=outline_color,
+            drawer=drawer,
+            font_size_step=font_size_step,
+            **text,
             **kwargs
             )
 
-        i += 1
-
     return img
 
 
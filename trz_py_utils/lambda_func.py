@@ -1,13 +1,14 @@
-import logging as log
+import logging
 import json
 from http.client import responses
-from typing import Any
+from typing import Any, Callable
 from socket import gethostname
 
-from aws_lambda_powertools.utilities.validation import validator
+import fastjsonschema
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.utilities.validation.exceptions import (
-    SchemaValidationError
+    InvalidSchemaFormatError,
+    SchemaValidationError,
 )
 from aws_lambda_powertools.utilities.data_classes import (
     APIGatewayProxyEventV2,
@@ -19,7 +20,11 @@ from mypy_boto3_lambda.client import LambdaClient
 from trz_py_utils.fmt import dumps
 
 
-# log = logging.getLogger(__name__)
+log = logging.getLogger(__name__)
+
+# fastjsonschema validators compiled from schemas, by id(schema)
+_COMPILED_SCHEMAS: dict[int, tuple[dict, Callable]] = {}
+MAX_CACHED_SCHEMAS = 32
 
 
 def error_response(code: int, exception: Exception, **kwargs):
@@ -55,12 +60,15 @@ def error_response(code: int, exception: Exception, **kwargs):
         True
     """
     log.info("returning error response...")
-    try:
-        message = responses[code]
-    except KeyError:
+    if code not in responses:
+        log.warning("couldn't find response for code '%s', using 500...",
+                    code)
         code = 500
-        message = "Internal Server Error"
-        log.warn(f"couldn't find response for code '{code}', using 500...")
+    body = {
+        "error": responses[code],
+        "message": f"{type(exception).__name__}: {exception}",
+        **kwargs,
+    }
     response = {
         "statusCode": code,
         "headers": {
@@ -69,14 +77,11 @@ def error_response(code: int, exception: Exception, **kwargs):
             "Access-Control-Allow-Methods": "*",
         },
         "isBase64Encoded": False,
-        "body": {
-            "error": message,
-            "message": f"{type(exception).__name__}: {exception}",
-        }
+        "body": dumps(body),
     }
-    response.get("body").update(kwargs)
-    response["body"] = dumps(response["body"])
-    log.info(dumps(response))
+    # the body is already a string, only serialize the rest if it's logged
+    if log.isEnabledFor(logging.INFO):
+        log.info(dumps(response))
     return response
 
 
@@ -113,9 +118,7 @@ def success_response(message: str, **kwargs):
     log.info("returning success reponse...")
     response = {
         "statusCode": 200,
-        "body": {
-            "message": message,
-        },
+        "body": dumps({"message": message, **kwargs}),
         "headers": {
             "Access-Control-Allow-Headers": "*",
             "Access-Control-Allow-Origin": "*",
@@ -123,21 +126,23 @@ def success_response(message: str, **kwargs):
         },
         "isBase64Encoded": False,
     }
-    response.get("body").update(kwargs)
-    response["body"] = dumps(response["body"])
-    log.info(dumps(response))
+    # the body is already a string, only serialize the rest if it's logged
+    if log.isEnabledFor(logging.INFO):
+        log.info(dumps(response))
     return response
 
 
 def parser(event, context: LambdaContext) -> tuple[Exception, str]:
     try:
         body = APIGatewayProxyEventV2(event).body
-        log.info("got body:")
-        log.info(json.dumps(body, indent=4))
+        log.info("got body: %s", body)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("body:\n%s", json.dumps(body, indent=4))
         return None, body
     except Exception as e:
         log.error("ERROR bad request format:")
-        log.info(json.dumps(event, indent=4))
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(event, indent=4))
         return e, None
 
 
@@ -351,11 +356,50 @@ def parse_event(event: APIGatewayProxyEventV2,
         log.debug("JSON decode failed, ignoring")
         log.debug(e)
     try:
-        return validator(parser, inbound_schema=schema)(event, context)
+        if schema:
+            _validate(event, schema)
+        return parser(event, context)
     except SchemaValidationError as e:
         return e, {}
 
 
+def _validate(event: dict, schema: dict):
+    """Validate event against schema, raising the same errors as
+    powertools' @validator, without it recompiling the schema each call."""
+    try:
+        _compiled(schema)(event)
+    except fastjsonschema.JsonSchemaValueException as e:
+        raise SchemaValidationError(
+            f"Failed schema validation. Error: {e.message}, "
+            f"Path: {e.path}, Data: {e.value}",
+            validation_message=e.message,
+            name=e.name,
+            path=e.path,
+            value=e.value,
+            definition=e.definition,
+            rule=e.rule,
+            rule_definition=e.rule_definition,
+        )
+
+
+def _compiled(schema: dict) -> Callable:
+    """fastjsonschema validator for schema, compiled once.
+    Schemas are dicts (unhashable) so they're keyed by id, and kept in the
+    cache so that id can't be reused by another object."""
+    key = id(schema)
+    if key not in _COMPILED_SCHEMAS:
+        if len(_COMPILED_SCHEMAS) >= MAX_CACHED_SCHEMAS:
+            _COMPILED_SCHEMAS.clear()
+        try:
+            validate = fastjsonschema.compile(schema, formats={})
+        except (TypeError, AttributeError,
+                fastjsonschema.JsonSchemaDefinitionException) as e:
+            raise InvalidSchemaFormatError(
+                f"Schema received: {schema}, Formats: {{}}. Error: {e}")
+        _COMPILED_SCHEMAS[key] = (schema, validate)
+    return _COMPILED_SCHEMAS[key][1]
+
+
 def get_or_make_request_id(event: APIGatewayProxyEventV2):
     """Parse requestId or craft one if running locally.
 
@@ -403,10 +447,11 @@ def parse_invoke_response(response: dict[str, Any | StreamingBody]):
         {'body': 'example'}
     """  # noqa
     streaming_body: StreamingBody = response["Payload"]
-    payload_str = streaming_body.read().decode("utf-8")
-    response: dict = json.loads(payload_str)
+    # json.loads() detects utf-8/16/32 in bytes, no separate decode needed
+    response: dict = json.loads(streaming_body.read())
     if not isinstance(response, dict):
-        log.warn(f"expected response type dict, but got {type(response)}!")
+        log.warning("expected response type dict, but got %s!",
+                    type(response))
 
     return response
 
@@ -445,7 +490,7 @@ def handle_lambda_response(name: str,
 
     status = response.get("statusCode", 500)
     if status == 200:
-        log.info(f"200 OK response from '{name}' lambda")
+        log.info("200 OK response from '%s' lambda", name)
         log.info(response)
     else:
         msg = f"ERROR lambda '{name}' response not OK ({status}): {response}"
@@ -468,8 +513,10 @@ def call_lambda(name: str, payload: Any, lambda_client: LambdaClient):
     Returns:
         tuple[Exception, dict]: error (or None) and response object
     """
-    log.info(f"invoking lambda '{name}'...")
-    log.info(f"with payload:\n {json.dumps(payload, indent=4)}")
+    log.info("invoking lambda '%s'...", name)
+    log.info("with payload: %s", payload)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("payload:\n%s", json.dumps(payload, indent=4))
 
     # Invoke the target Lambda function
     response_raw = lambda_client.invoke(
@@ -2,13 +2,26 @@ import logging
 import sys
 
 
+FORMATTER = logging.Formatter(
+    "[%(levelname)s][%(funcName)s:%(lineno)d] %(message)s")
+
+
 def get_logger():
+    """Logger for this package, writing to stdout.
+    The handler is only added once, however many times this is called.
+
+    Example:
+        >>> from trz_py_utils.log import get_logger
+        >>> get_logger() is get_logger()
+        True
+        >>> len(get_logger().handlers)
+        1
+    """
     logger = logging.getLogger(__name__)
     # logger._logger.propagate = False
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        "[%(levelname)s][%(funcName)s:%(lineno)d] %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(FORMATTER)
+        logger.addHandler(handler)
 
     return logger
@@ -5,33 +5,112 @@ from io import BytesIO
 from uuid import uuid4
 from urllib.parse import (
   urlencode,
-  urlparse,
-  urlunparse,
+  urlsplit,
   unquote,
-  ParseResult
+  quote,
+  quote_plus,
+  SplitResult
 )
 import enlighten
+from botocore.config import Config
+from botocore.credentials import ReadOnlyCredentials
 from botocore.exceptions import ClientError
 import os
 import boto3
-from typing import Any
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from typing import Any, BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from functools import lru_cache
+import codecs
 import json
+import locale
 import re
-from s3fs import S3FileSystem
+import time
 
 from mypy_boto3_s3.client import S3Client
-from mypy_boto3_s3.service_resource import Bucket, Object, S3ServiceResource
+from mypy_boto3_s3.service_resource import Object, S3ServiceResource
+
+try:
+    import re2  # google-re2, optional
+except ImportError:
+    re2 = None
 
 from trz_py_utils import fmt
 from trz_py_utils.fmt import sizeof_fmt
-from trz_py_utils.file import BadLine
+from trz_py_utils.file import (
+  BadLine,
+  IO_BUFFER_BYTES,
+  READ_CHUNK_BYTES,
+  tmp_path,
+)
 
 
 # log = logging.getLogger(__name__)
 
 
 REGION = os.environ.get("AWS_REGION", "us-east-2")
-S3_RESOURCE: S3ServiceResource = boto3.resource("s3", region_name=REGION)
+# more pooled keep-alive connections than botocore's 10, so concurrent calls
+# don't each pay for a new TLS handshake
+CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 10},
+)
+# for existence checks: give up on a slow HEAD sooner, but still retry it
+FAIL_FAST_CONFIG = CLIENT_CONFIG.merge(Config(
+    retries={"mode": "standard", "max_attempts": 3},
+    connect_timeout=1,
+    read_timeout=2,
+))
+S3_RESOURCE: S3ServiceResource = boto3.resource("s3", region_name=REGION,
+                                                config=CLIENT_CONFIG)
+# optimal Huffman tables and progressive scans: ~10% smaller JPEGs on the wire
+JPEG_SAVE_KWARGS = {"quality": 75, "optimize": True, "progressive": True}
+# zlib level 1 is several times faster than the default 6, files a bit bigger
+PNG_SAVE_KWARGS = {"compress_level": 1, "optimize": False}
+# bigger parts and io chunks than boto3's defaults (8 MiB / 256 KiB)
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=10,
+    io_chunksize=1024 * 1024,
+    max_io_queue=1000,
+    use_threads=True,
+)
+# smallest part S3 takes in a multipart upload, except for the last one
+MIN_PART_BYTES = 5 * 1024 * 1024
+PBAR_UPDATE_BYTES = 4 * 1024 * 1024
+# encodings in which any ASCII bytes decode, so ASCII lines can skip decoding
+ASCII_COMPATIBLE_CODECS = frozenset(
+    ("ascii", "utf-8", "latin-1", "iso8859-1", "cp1252"))
+
+
+class _BatchedProgress:
+    """boto3 transfer Callback which only updates the progress bar every
+    `every` bytes, instead of once per (256 KiB) chunk. Transfer threads
+    call it concurrently, hence the lock."""
+
+    def __init__(self, pbar, every: int = PBAR_UPDATE_BYTES):
+        self.pbar = pbar
+        self.every = every
+        self.pending = 0
+        self.lock = Lock()
+
+    def __call__(self, chunk: int):
+        with self.lock:
+            self.pending += chunk
+            if self.pending < self.every:
+                return
+            pending, self.pending = self.pending, 0
+        self.pbar.update(pending)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, 0
+        if pending:
+            self.pbar.update(pending)
 
 
 class S3ImageFormat(Enum):
@@ -56,6 +135,13 @@ class S3ImageFormat(Enum):
             S3ImageFormat.PNG: "PNG",
         }[self]
 
+    def save_kwargs(self):
+        """default Image.save() options for this format"""
+        return {
+            S3ImageFormat.JPEG: JPEG_SAVE_KWARGS,
+            S3ImageFormat.PNG: PNG_SAVE_KWARGS,
+        }[self]
+
     @staticmethod
     def from_filepath(filepath):
         extension = filepath.split(".")[-1].lower()
@@ -69,18 +155,24 @@ class S3ImageFormat(Enum):
             raise ValueError("File extension must be jpeg, jpg, or png")
 
 
-def upload_img(image: Image, bucket_name: str,
-               key: str, s3_resource: S3ServiceResource,
-               format: S3ImageFormat = None):
-    """save pillow Image locally then upload to S3 with ContentType
+def upload_img(image: Image.Image | bytes | memoryview | BinaryIO,
+               bucket_name: str, key: str, s3_resource: S3ServiceResource,
+               format: S3ImageFormat = None, **save_kwargs):
+    """save pillow Image locally then upload to S3 with ContentType.
+    Already-encoded bytes or file objects are uploaded as-is, not re-encoded.
 
     Args:
-        image (PIL.Image): image from pillow module
+        image (PIL.Image | bytes | memoryview | BinaryIO): image from
+            pillow module, or image data already encoded as `format` (eg.
+            by encode_image())
         bucket_name (str): name of s3 bucket to save image to
         key (str): name of the s3 "file" to save image
         s3_resource (S3ServiceResource): _description_
         format (S3ImageFormat, optional): either png or jpeg. Defaults to
             S3ImageFormat.JPEG.
+        **save_kwargs: passed to image.save(), overriding JPEG_SAVE_KWARGS
+            or PNG_SAVE_KWARGS, eg. quality=75, optimize=False for faster
+            JPEG encoding.
 
     Returns:
         _type_: _description_
@@ -121,21 +213,163 @@ def upload_img(image: Image, bucket_name: str,
         >>> upload_img(image, bucket, key, s3_r, format=S3ImageFormat.JPEG)
         s3.Object(bucket_name='trz-s3-test', key='s3-upload-test2.jpg')
     """
+    key = _upload_img(image, bucket_name, key, s3_resource.meta.client,
+                      format, **save_kwargs)
+    return s3_resource.Object(bucket_name, key)
+
+
+def _upload_img(image: Image.Image | bytes | memoryview | BinaryIO,
+                bucket_name: str, key: str, s3_client: S3Client,
+                format: S3ImageFormat = None, **save_kwargs) -> str:
+    """upload_img() with only the client, which (unlike the resource and its
+    Objects) is safe to share between threads. Returns the key uploaded to.
+    """
     format = format or S3ImageFormat.from_filepath(key)
-    log.info(f"uploading image '{key}' as {format}...")
+    log.info("uploading image '%s' as %s...", key, format)
+    if isinstance(image, Image.Image):
+        # upload straight from the buffer, getvalue() would copy the image
+        body = _encode_image(image, format, **save_kwargs)
+    else:
+        body = image
+
+    return _put_img(s3_client, bucket_name, key, body, format)
+
+
+def encode_image(image: Image.Image, format: S3ImageFormat,
+                 **save_kwargs) -> memoryview:
+    """Encode a pillow Image the way upload_img() does, without copying the
+    encoded bytes out of the buffer (like BytesIO.getvalue() would).
+    Use bytes(...) on the result if an immutable copy is needed.
+    upload_img() takes the result as-is, copying it once into a BytesIO.
+
+    Example:
+        >>> from trz_py_utils.s3 import encode_image, S3ImageFormat
+        >>> from PIL import Image
+        >>> data = encode_image(Image.new('RGB', (10, 10)), S3ImageFormat.PNG)
+        >>> bytes(data[:4])
+        b'\\x89PNG'
+    """
+    return _encode_image(image, format, **save_kwargs).getbuffer()
+
+
+def _encode_image(image: Image.Image, format: S3ImageFormat,
+                  **save_kwargs) -> BytesIO:
     bytes_img = BytesIO()
-    image.save(bytes_img, format=format.pillow_format())
+    save_kwargs = {**format.save_kwargs(), **save_kwargs}
+    image.save(bytes_img, format=format.pillow_format(), **save_kwargs)
+    bytes_img.seek(0)
+    return bytes_img
+
+
+def upload_img_file(filepath: str, bucket_name: str,
+                    key: str, s3_resource: S3ServiceResource,
+                    format: S3ImageFormat = None):
+    """Upload an image file as-is (no decoding/re-encoding) with ContentType.
+
+    Args:
+        filepath (str): local jpeg or png file
+        bucket_name (str): name of s3 bucket to save image to
+        key (str): name of the s3 "file" to save image
+        s3_resource (S3ServiceResource): _description_
+        format (S3ImageFormat, optional): either png or jpeg. Defaults to
+            the format of `filepath`.
+
+    Example:
+        >>> from trz_py_utils.s3 import upload_img_file
+        >>> from trz_py_utils import file
+        >>> from PIL import Image
+        >>> from boto3 import resource
+        >>> s3_r = resource("s3", region_name="us-east-2")
+        >>> filepath = file.tmp_path(".png")
+        >>> Image.new('RGB', (10, 10)).save(filepath)
+        >>> key = "s3-upload-test.png"
+        >>> upload_img_file(filepath, "trz-s3-test", key, s3_r)
+        s3.Object(bucket_name='trz-s3-test', key='s3-upload-test.png')
+    """
+    format = format or S3ImageFormat.from_filepath(filepath)
+    log.info("uploading image file '%s' as %s...", filepath, format)
+    with open(filepath, "rb", buffering=IO_BUFFER_BYTES) as body:
+        key = _put_img(s3_resource.meta.client, bucket_name, key, body,
+                       format)
+    return s3_resource.Object(bucket_name, key)
+
+
+def _put_img(s3_client: S3Client, bucket_name: str, key: str,
+             body: bytes | memoryview | BinaryIO,
+             format: S3ImageFormat) -> str:
     # strip off ".png" extension
-    log.debug(f"stripping extension '{key.split('.')[-1]}' off '{key}'...")
-    name_no_ext = ".".join(key.split('.')[:-1])
-    bucket: Bucket = s3_resource.Bucket(bucket_name)
-    obj: Object = bucket.put_object(
-        Key=name_no_ext+format.ext(),
-        Body=bytes_img.getvalue(),
-        ContentType=format.content_type())
-    log.info(f"uploaded 's3://{obj.bucket_name}/{obj.key}'.")
+    name_no_ext, old_ext = key.rsplit(".", 1) if "." in key else (key, "")
+    log.debug("stripping extension '%s' off '%s'...", old_ext, key)
+    key = name_no_ext+format.ext()
+    if isinstance(body, memoryview):
+        # eg. from encode_image(), botocore only takes bytes or file objects
+        body = BytesIO(body)
+    is_file = hasattr(body, "read")
+    if isinstance(body, BytesIO):
+        # eg. an encoded image, sized without copying it out of the buffer
+        size = body.getbuffer().nbytes
+    else:
+        size = None if is_file else len(body)
+    if size is None or size > TRANSFER_CONFIG.multipart_threshold:
+        # streams file objects, even unseekable ones, and big bodies get a
+        # concurrent multipart upload (which also works past PUT's 5 GB)
+        if not is_file:
+            body = BytesIO(body)
+        s3_client.upload_fileobj(
+            body, bucket_name, key,
+            ExtraArgs={"ContentType": format.content_type()},
+            Config=TRANSFER_CONFIG)
+    else:
+        # small (in-memory) bodies in one PUT, without a transfer manager
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=key,
+            Body=body,
+            ContentType=format.content_type())
+    log.info("uploaded 's3://%s/%s'.", bucket_name, key)
+
+    return key
+
+
+def upload_imgs(images: list[tuple[Image.Image | bytes | BinaryIO, str]],
+                bucket_name: str, s3_resource: S3ServiceResource,
+                format: S3ImageFormat = None, max_workers: int = None,
+                **save_kwargs) -> list[Object]:
+    """upload_img() many (image, key) pairs concurrently, sharing one client.
+
+    Args:
+        images (list[tuple[Image, str]]): (image, key) pairs to upload
+        bucket_name (str): name of s3 bucket to save images to
+        s3_resource (S3ServiceResource): _description_
+        format (S3ImageFormat, optional): Defaults to each key's extension.
+        max_workers (int, optional): concurrent uploads. Defaults to the
+            client's max_pool_connections, so connections aren't discarded.
 
-    return obj
+    Returns:
+        list[Object]: uploaded objects, in the same order as `images`
+
+    Example:
+        >>> from trz_py_utils.s3 import upload_imgs
+        >>> from PIL import Image
+        >>> from boto3 import resource
+        >>> s3_r = resource("s3", region_name="us-east-2")
+        >>> images = [(Image.new('RGB', (10, 10)), f"s3-upload-test{i}.png")
+        ...           for i in range(3)]
+        >>> upload_imgs(images, "trz-s3-test", s3_r)[0]
+        s3.Object(bucket_name='trz-s3-test', key='s3-upload-test0.png')
+    """
+    s3_client: S3Client = s3_resource.meta.client
+    max_workers = max_workers or _pool_size(s3_client)
+
+    def upload(image_key):
+        image, key = image_key
+        return _upload_img(image, bucket_name, key, s3_client, format,
+                           **save_kwargs)
+
+    # threads only share the client, the Objects are made on this one
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        keys = list(pool.map(upload, images))
+    return [s3_resource.Object(bucket_name, key) for key in keys]
 
 
 def upload_obj(filepath: str, s3_obj: Object = None,
@@ -182,43 +416,62 @@ def upload_obj(filepath: str, s3_obj: Object = None,
     bucket = bucket or s3_obj.bucket_name
     key = key or s3_obj.key
 
-    s3_path = f"{bucket}/{key}"
-    log.info(f"uploading local file to S3:\n{filepath}\n{s3_path}")
-    log.info(f"with kwargs:\n{json.dumps(kwargs, indent=4)}")
+    log.info("uploading local file to S3:\n%s\n%s/%s", filepath, bucket, key)
+    if log.getLogger().isEnabledFor(log.INFO):
+        log.info("with kwargs:\n%s", json.dumps(kwargs, indent=4))
+
+    if s3_obj is None or (s3_obj.bucket_name, s3_obj.key) != (bucket, key):
+        s3_obj = S3_RESOURCE.Object(bucket_name=bucket, key=key)
+
+    # by path, so each transfer thread reads its own part of the file
+    return _upload_with_progress(s3_obj, filepath,
+                                 os.path.getsize(filepath), **kwargs)
 
-    s3_obj = S3_RESOURCE.Object(bucket_name=bucket, key=key)
 
+def _upload_with_progress(s3_obj: Object, source: str | BinaryIO,
+                          size: int, **kwargs):
+    """upload_file() a path or upload_fileobj() a file object, with a
+    progress bar, returning the error if there is one."""
     # Use enlighten to create a progress bar
     opts = {
-        "total": os.path.getsize(filepath),
+        "total": size,
         "unit": 'B',
         "unit_scale": True,
         "unit_divisor": 1024,
         "desc": "uploading...",
+        "min_delta": 0.2,
     }
+    kwargs.setdefault("Config", TRANSFER_CONFIG)
+    callback = kwargs.pop("Callback", None)
+    upload = s3_obj.upload_file if isinstance(source, str) \
+        else s3_obj.upload_fileobj
     with enlighten.get_manager().counter(**opts) as pbar:
+        bar_progress = _BatchedProgress(pbar)
+        # a caller's Callback still gets every chunk, as boto3 would call it
+        progress = bar_progress if callback is None \
+            else lambda chunk: (bar_progress(chunk), callback(chunk))
         try:
-            with open(filepath, 'rb') as file:
-                s3_obj.upload_fileobj(file,
-                                      Callback=lambda ch: pbar.update(ch),
-                                      **kwargs)
-        except (ClientError, TypeError) as e:
-            log.error(f"error uploading: {e}")
+            upload(source, Callback=progress, **kwargs)
+        except (ClientError, S3UploadFailedError, TypeError) as e:
+            log.error("error uploading: %s", e)
             return e
-    log.info(f"uploaded '{bucket}/{key}'.")
+        bar_progress.flush()
+    log.info("uploaded '%s/%s'.", s3_obj.bucket_name, s3_obj.key)
 
     return None
 
 
-def download_obj(s3_obj: Object, fp=f"/tmp/{uuid4()}"):
+def download_obj(s3_obj: Object, fp: str = None,
+                 config: TransferConfig = None):
     """_summary_
 
     Args:
         s3_obj (Object): object to download
-        fp (_type_, optional): filepath. Defaults to f"/tmp/{uuid4()}".
+        fp (str, optional): filepath. Defaults to a new file in /tmp.
+        config (TransferConfig, optional): Defaults to TRANSFER_CONFIG.
 
     Returns:
-        _type_: _description_
+        str: path to downloaded file
 
     Example:
         >>> from trz_py_utils.s3 import download_obj
@@ -228,25 +481,28 @@ def download_obj(s3_obj: Object, fp=f"/tmp/{uuid4()}"):
         >>> download_obj(s3_obj)
         '/tmp/...'
     """
+    fp = fp or tmp_path()
     log.info("downloading S3 object...")
-    log.info(f"'s3://{s3_obj.bucket_name}/{s3_obj.key}' -> {fp}")
-    log.debug("calling s3_obj.get() for debug purposes...")
-    log.debug(s3_obj.get())
+    log.info("'s3://%s/%s' -> %s", s3_obj.bucket_name, s3_obj.key, fp)
     s3_client: S3Client = s3_obj.meta.client
-    with open(fp, 'wb') as f:
-        s3_client.download_fileobj(s3_obj.bucket_name, s3_obj.key, f)
+    with open(fp, 'wb', buffering=IO_BUFFER_BYTES) as f:
+        _prepare_download_file(f.fileno())
+        s3_client.download_fileobj(s3_obj.bucket_name, s3_obj.key, f,
+                                   Config=config or TRANSFER_CONFIG)
     log.info("done.")
 
     return fp
 
 
-def download_object(s3_obj: Object, fp: str = f"/tmp/{uuid4()}"):
+def download_object(s3_obj: Object, fp: str = None,
+                    config: TransferConfig = None):
     """Download an object from S3 and show progress bar.
 
     Args:
         s3_obj (Object): object to download
         fp (str, optional): filepath to save to. note: lambda functions
-        can only save to /tmp. Defaults to f"/tmp/{uuid4()}".
+        can only save to /tmp. Defaults to a new file in /tmp.
+        config (TransferConfig, optional): Defaults to TRANSFER_CONFIG.
 
     Returns:
         str: path to downloaded file
@@ -267,13 +523,15 @@ def download_object(s3_obj: Object, fp: str = f"/tmp/{uuid4()}"):
         >>> download_object(s3_obj, "/tmp/myfile")
         '/tmp/myfile'
     """
+    fp = fp or tmp_path()
     s3_client = s3_obj.meta.client
-    # Get the size of the S3 object for progress tracking
+    config = config or TRANSFER_CONFIG
+    # Get the size of the S3 object for progress tracking, from the GET
+    # itself instead of a separate HEAD
     log.info("getting file size from ContentLength header...")
-    response = s3_client.head_object(Bucket=s3_obj.bucket_name,
-                                     Key=s3_obj.key)
+    response = _get_or_raise(s3_obj)
     total_size = response['ContentLength']
-    log.info(f"file size: {sizeof_fmt(total_size)}")
+    log.info("file size: %s", sizeof_fmt(total_size))
 
     # Use enlighten to create a progress bar
     opts = {
@@ -282,20 +540,134 @@ def download_object(s3_obj: Object, fp: str = f"/tmp/{uuid4()}"):
         "unit_scale": True,
         "unit_divisor": 1024,
         "desc": "downloading...",
+        "min_delta": 0.2,
     }
-    log.info(f"downloading '{make_console_url(s3_obj)}'...")
+    if log.getLogger().isEnabledFor(log.INFO):
+        log.info("downloading '%s'...", make_console_url(s3_obj))
     with enlighten.get_manager().counter(**opts) as pbar:
+        progress = _BatchedProgress(pbar)
         # Open a file-like object to write the S3 object contents
-        with open(fp, 'wb') as f:
-            s3_client.download_fileobj(
-                s3_obj.bucket_name,
-                s3_obj.key,
-                f,
-                Callback=lambda chunk: pbar.update(chunk))
+        with open(fp, 'wb', buffering=IO_BUFFER_BYTES) as f:
+            _prepare_download_file(f.fileno(), total_size)
+            if total_size <= config.multipart_threshold:
+                for chunk in response["Body"].iter_chunks(READ_CHUNK_BYTES):
+                    f.write(chunk)
+                    progress(len(chunk))
+            else:
+                # big enough for concurrent ranged GETs, drop this stream
+                response["Body"].close()
+                s3_client.download_fileobj(
+                    s3_obj.bucket_name,
+                    s3_obj.key,
+                    f,
+                    Callback=progress,
+                    Config=config)
+        progress.flush()
+
+    return fp
+
+
+def download_objs(s3_objs: list[Object], dir: str = "/tmp",
+                  max_workers: int = None) -> list[str]:
+    """download_obj() many objects concurrently, each to a new file in `dir`.
+
+    Args:
+        s3_objs (list[Object]): objects to download
+        dir (str, optional): directory to save to. Defaults to "/tmp".
+        max_workers (int, optional): concurrent downloads. Defaults to the
+            first object's client max_pool_connections.
+
+    Returns:
+        list[str]: downloaded filepaths, in the same order as `s3_objs`
+
+    Example:
+        >>> from trz_py_utils.s3 import download_objs
+        >>> from boto3 import resource
+        >>> s3_resource = resource("s3", region_name="us-east-2")
+        >>> s3_obj = s3_resource.Object("trz-s3-test", "figure-65.png")
+        >>> download_objs([s3_obj, s3_obj])
+        ['/tmp/...', '/tmp/...']
+    """
+    if not s3_objs:
+        return []
+    max_workers = max_workers or _pool_size(s3_objs[0].meta.client)
+
+    def download(s3_obj):
+        return download_obj(s3_obj, os.path.join(dir, str(uuid4())))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(download, s3_objs))
+
+
+def _pool_size(s3_client: S3Client) -> int:
+    """max_pool_connections of a client, so a thread pool doesn't outgrow it"""
+    return s3_client.meta.config.max_pool_connections
+
+
+def download_obj_parallel(s3_obj: Object, fp: str = None,
+                          part_size: int = 16 * 1024 * 1024,
+                          max_workers: int = 10):
+    """Download an object with concurrent ranged GETs, each part written
+    straight into its slice of the file. The threads share one client like
+    the object's own (see _get_shared_client), so keep max_workers <= its
+    pool size.
+
+    Args:
+        s3_obj (Object): object to download
+        fp (str, optional): filepath. Defaults to a new file in /tmp.
+        part_size (int, optional): bytes per GET. Defaults to 16 MiB.
+        max_workers (int, optional): concurrent GETs. Defaults to 10.
+
+    Returns:
+        str: path to downloaded file
+
+    Example:
+        >>> from trz_py_utils.s3 import download_obj_parallel
+        >>> from boto3 import resource
+        >>> s3_resource = resource("s3", region_name="us-east-2")
+        >>> s3_obj = s3_resource.Object("trz-s3-test", "figure-65.png")
+        >>> download_obj_parallel(s3_obj, part_size=1024)
+        '/tmp/...'
+    """
+    fp = fp or tmp_path()
+    s3_client = _get_shared_client(s3_obj.meta.client)
+    bucket, key = s3_obj.bucket_name, s3_obj.key
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    size, etag = head["ContentLength"], head["ETag"]
+    log.info("downloading %s in %s parts to %s...", sizeof_fmt(size),
+             -(-size // part_size), fp)
+
+    def download_part(start: int):
+        end = min(start + part_size, size) - 1
+        # IfMatch fails the part if the object changes mid-download
+        body = s3_client.get_object(Bucket=bucket, Key=key, IfMatch=etag,
+                                    Range=f"bytes={start}-{end}")["Body"]
+        for chunk in body.iter_chunks(READ_CHUNK_BYTES):
+            os.pwrite(fd, chunk, start)
+            start += len(chunk)
+
+    fd = os.open(fp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _prepare_download_file(fd, size)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # list() so an error from any part is raised here
+            list(pool.map(download_part, range(0, size, part_size)))
+    finally:
+        os.close(fd)
+    log.info("done.")
 
     return fp
 
 
+def _prepare_download_file(fd: int, size: int = None):
+    """Hint the kernel that fd is written sequentially, and reserve `size`
+    bytes up front when known (Linux only, skipped elsewhere)."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    if size and hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(fd, 0, size)
+
+
 def make_s3_url(s3_obj: Object):
     """makes a URL which loads directly in any browser regardless of aws auth.
     eg. 'https://trz-rekognition-dev.s3.us-east-2.amazonaws.com/figure-65.png'
@@ -313,19 +685,27 @@ def make_s3_url(s3_obj: Object):
         >>> s3_obj = s3_resource.Object("trz-s3-test", "figure-65.png")
         >>> make_s3_url(s3_obj)
         'https://trz-s3-test.s3.us-east-2.amazonaws.com/figure-65.png'
+        >>> make_s3_url(s3_resource.Object("trz-s3-test", "a b/#1.png"))
+        'https://trz-s3-test.s3.us-east-2.amazonaws.com/a%20b/%231.png'
     """
-    url = urlparse(s3_obj.meta.client.meta.endpoint_url)
-    url = url._replace(netloc=f"{s3_obj.bucket_name}.{url.netloc}")
-    url = url._replace(path=f"/{s3_obj.key}")
-    return urlunparse(url)
+    scheme, netloc = _parse_endpoint(s3_obj.meta.client.meta.endpoint_url)
+    # percent-encode the key (but not its "/"), eg. spaces, "#" or "?"
+    return f"{scheme}://{s3_obj.bucket_name}.{netloc}/{quote(s3_obj.key)}"
+
+
+@lru_cache(maxsize=32)
+def _parse_endpoint(endpoint_url: str) -> tuple[str, str]:
+    """(scheme, netloc) of a client's endpoint, parsed once per endpoint."""
+    url = urlsplit(endpoint_url)
+    return url.scheme, url.netloc
 
 
 def make_s3_presigned_url(s3_obj: Object, expiry=604800):
-    """Makes a pre-signed URL for an S3 object. Expires in 7 days.
+    """Makes a pre-signed URL for an S3 object. Expires in 7 days by default.
 
     Args:
         s3_obj (Object): _description_
-        expiry (int, optional): _description_. Defaults to 604800.
+        expiry (int, optional): seconds the URL is valid. Defaults to 604800.
 
     Returns:
         str: web link to load an object in the browser.
@@ -342,10 +722,56 @@ def make_s3_presigned_url(s3_obj: Object, expiry=604800):
     return s3_client.generate_presigned_url(
         'get_object',
         Params={'Bucket': s3_obj.bucket_name, 'Key': s3_obj.key},
-        ExpiresIn=604800  # 7 days
+        ExpiresIn=expiry
     )
 
 
+def make_cached_presigned_url(s3_obj: Object, expiry=604800):
+    """Like make_s3_presigned_url(), but the same URL is returned for half
+    of its lifetime, so it's only signed once and browsers/CDNs can cache
+    it. Returned URLs are valid for at least another `expiry / 2` seconds,
+    unless signed with temporary credentials (eg. Lambda's, STS), which
+    URLs never outlive: those are re-signed once boto3 refreshes them
+    (~15 minutes before they expire), but not before.
+
+    Args:
+        s3_obj (Object): _description_
+        expiry (int, optional): seconds the URL is valid. Defaults to 7 days.
+
+    Returns:
+        str: web link to load an object in the browser.
+
+    Example:
+        >>> from trz_py_utils.s3 import make_cached_presigned_url
+        >>> from boto3 import resource
+        >>> s3_resource = resource("s3", region_name="us-east-2")
+        >>> s3_obj = s3_resource.Object("trz-s3-test", "figure-65.png")
+        >>> url = make_cached_presigned_url(s3_obj)
+        >>> url == make_cached_presigned_url(s3_obj)
+        True
+    """
+    window = int(time.time()) // max(expiry // 2, 1)
+    s3_client: S3Client = s3_obj.meta.client
+    # refreshes them if they're about to expire, like signing a URL would
+    credentials = s3_client._request_signer._credentials
+    frozen = credentials.get_frozen_credentials() if credentials else None
+    signer = frozen and (frozen.access_key, frozen.token)
+    return _presigned_url(s3_client, s3_obj.bucket_name, s3_obj.key,
+                          expiry, window, signer)
+
+
+@lru_cache(maxsize=4096)
+def _presigned_url(s3_client: S3Client, bucket: str, key: str, expiry: int,
+                   window: int, signer: tuple[str, str] | None):
+    """`window` and `signer` (access key and session token) are only part of
+    the cache key, so URLs are re-signed in every new window, and with new
+    credentials"""
+    return s3_client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': key},
+        ExpiresIn=expiry)
+
+
 def make_console_url(s3_obj: Object):
     """Returns a url string pointing to object in AWS Console.
     eg. 'https://s3.console.aws.amazon.com/s3/object/trz-rekognition-dev?region=us-east-2&prefix=figure-65.png'
@@ -364,17 +790,11 @@ def make_console_url(s3_obj: Object):
         >>> make_console_url(s3_obj)
         'https://s3.console.aws.amazon.com/s3/object/trz-s3-test?...'
     """  # noqa
-    return ParseResult(
-        scheme="https",
-        netloc="s3.console.aws.amazon.com",
-        path=f"s3/object/{s3_obj.bucket_name}",
-        params="",
-        query=urlencode({
-            "region": s3_obj.meta.client.meta.region_name,
-            "prefix": s3_obj.key
-        }),
-        fragment=""
-    ).geturl()
+    # quote_plus() encodes the key the same way urlencode() would
+    return (f"https://s3.console.aws.amazon.com/s3/object/"
+            f"{s3_obj.bucket_name}"
+            f"?region={s3_obj.meta.client.meta.region_name}"
+            f"&prefix={quote_plus(s3_obj.key)}")
 
 
 def test_if_object_exists(s3_obj: Object) -> tuple[Exception, int]:
@@ -408,18 +828,169 @@ def test_if_object_exists(s3_obj: Object) -> tuple[Exception, int]:
         >>> error
         ValueError("403/404: object doesn't exists or you don't have access...
     """
+    s3_client = _fail_fast_client(s3_obj.meta.client)
     try:
-        s3_obj.load()
+        s3_client.head_object(Bucket=s3_obj.bucket_name, Key=s3_obj.key)
         return None, 200
     except ClientError as e:
-        if int(e.response['Error']['Code']) in (403, 404):
-            msg = "403/404: object doesn't exists or you don't have access"
-            msg += f" to '{s3_obj.bucket_name}/{s3_obj.key}'"
-            return ValueError(msg), e.response['Error']['Code']
+        # Error.Code isn't always numeric (eg. "NoSuchKey"), the status is
+        code = e.response['ResponseMetadata']['HTTPStatusCode']
+        if code in (403, 404):
+            return _not_found_error(s3_obj), code
         else:
             raise e
 
 
+def test_if_objects_exist(s3_objs: list[Object],
+                          max_workers: int = None
+                          ) -> list[tuple[Exception, int]]:
+    """test_if_object_exists() many objects concurrently. The HEADs share
+    the fail-fast client of each object's region, and its connections.
+
+    Args:
+        s3_objs (list[Object]): S3 objects to test for existence.
+        max_workers (int, optional): concurrent HEADs. Defaults to the
+            fail-fast client's max_pool_connections.
+
+    Returns:
+        list[tuple[Exception, int]]: (error, status code) pairs, in the same
+            order as `s3_objs`
+
+    Example:
+        >>> from trz_py_utils.s3 import test_if_objects_exist
+        >>> from boto3 import resource
+        >>> s3_resource = resource("s3", region_name="us-east-2")
+        >>> s3_objs = [s3_resource.Object("trz-s3-test", "figure-65.png"),
+        ...            s3_resource.Object("trz-s3-test", "fasdlkjasd")]
+        >>> [error is None for error, code in test_if_objects_exist(s3_objs)]
+        [True, False]
+    """
+    if not s3_objs:
+        return []
+    max_workers = max_workers or _pool_size(
+        _fail_fast_client(s3_objs[0].meta.client))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(test_if_object_exists, s3_objs))
+
+
+def head_or_raise(s3_obj: Object) -> int:
+    """Size of an object from a single HEAD, which also checks it exists.
+    Use this instead of test_if_object_exists() then another HEAD.
+
+    Args:
+        s3_obj (Object): S3 object to get the size of.
+
+    Raises:
+        ValueError: object doesn't exist or isn't accessible (403/404).
+
+    Returns:
+        int: ContentLength in bytes
+
+    Example:
+        >>> from trz_py_utils.s3 import head_or_raise
+        >>> from boto3 import resource
+        >>> s3_resource = resource("s3", region_name="us-east-2")
+        >>> s3_obj = s3_resource.Object("trz-s3-test", "figure-65.png")
+        >>> head_or_raise(s3_obj) > 0
+        True
+    """
+    try:
+        response = s3_obj.meta.client.head_object(Bucket=s3_obj.bucket_name,
+                                                  Key=s3_obj.key)
+    except ClientError as e:
+        if e.response['ResponseMetadata']['HTTPStatusCode'] in (403, 404):
+            raise _not_found_error(s3_obj) from e
+        raise
+    return response['ContentLength']
+
+
+def _get_or_raise(s3_obj: Object) -> dict:
+    """get_object() response, raising like head_or_raise() if it's missing"""
+    try:
+        return s3_obj.meta.client.get_object(Bucket=s3_obj.bucket_name,
+                                             Key=s3_obj.key)
+    except ClientError as e:
+        if e.response['ResponseMetadata']['HTTPStatusCode'] in (403, 404):
+            raise _not_found_error(s3_obj) from e
+        raise
+
+
+def _not_found_error(s3_obj: Object) -> ValueError:
+    msg = "403/404: object doesn't exists or you don't have access"
+    msg += f" to '{s3_obj.bucket_name}/{s3_obj.key}'"
+    return ValueError(msg)
+
+
+def _get_shared_client(s3_client: S3Client) -> S3Client:
+    """A client like s3_client with CLIENT_CONFIG's bigger connection pool,
+    shared by every caller with the same region, endpoint and credentials,
+    so its keep-alive connections are too.
+
+    Example:
+        >>> from trz_py_utils.s3 import _get_shared_client
+        >>> import boto3
+        >>> def client(key):
+        ...     return boto3.session.Session().client(
+        ...         "s3", region_name="us-east-2",
+        ...         aws_access_key_id=key, aws_secret_access_key="secret")
+        >>> shared = _get_shared_client(client("AKIA1"))
+        >>> shared is _get_shared_client(client("AKIA1"))
+        True
+        >>> shared is _get_shared_client(client("AKIA2"))
+        False
+        >>> shared.meta.config.max_pool_connections
+        64
+    """
+    return _client_like(s3_client, CLIENT_CONFIG)
+
+
+def _fail_fast_client(s3_client: S3Client) -> S3Client:
+    """A client like s3_client for existence checks, with short timeouts but
+    still the standard retries of 5xx, throttling and timeouts."""
+    return _client_like(s3_client, FAIL_FAST_CONFIG)
+
+
+def _client_like(s3_client: S3Client, config: Config) -> S3Client:
+    """A client for the same region, endpoint (eg. LocalStack), s3 options
+    (eg. path-style addressing) and credentials (eg. an assumed role) as
+    s3_client, with `config`. s3_client itself if its credentials can't be
+    read (eg. anonymous)."""
+    meta = s3_client.meta
+    # boto3 has no public way to get a client's credentials back
+    signer = getattr(s3_client, "_request_signer", None)
+    credentials = getattr(signer, "_credentials", None)
+    if credentials is None:
+        return s3_client
+    # refreshed if they're about to expire, which makes a new client
+    frozen = credentials.get_frozen_credentials()
+    s3_options = tuple(sorted((meta.config.s3 or {}).items()))
+    return _make_client(meta.region_name, meta.endpoint_url, s3_options,
+                        frozen, config)
+
+
+@lru_cache(maxsize=8)
+def _make_client(region: str, endpoint_url: str,
+                 s3_options: tuple[tuple[str, Any], ...],
+                 frozen: ReadOnlyCredentials, config: Config) -> S3Client:
+    """One client per region, endpoint, s3 options, credentials and config,
+    shared by every caller with the same ones. boto3 clients are
+    thread-safe, sessions aren't, so it's made in a throwaway session."""
+    def new_client(**kwargs) -> S3Client:
+        return boto3.session.Session().client(
+            "s3", region_name=region,
+            config=config.merge(Config(s3=dict(s3_options))),
+            aws_access_key_id=frozen.access_key,
+            aws_secret_access_key=frozen.secret_key,
+            aws_session_token=frozen.token, **kwargs)
+
+    s3_client = new_client()
+    # only pass a custom endpoint, the default one would mean path-style urls
+    if s3_client.meta.endpoint_url != endpoint_url:
+        s3_client = new_client(endpoint_url=endpoint_url)
+    return s3_client
+
+
 def write_text_to_obj(text: str, s3_obj: Object = None,
                       bucket: str = None, key: str = None, **kwargs):
     """Write a string to a new S3 object. For kwargs, see S3 object attributes:
@@ -453,8 +1024,11 @@ def write_text_to_obj(text: str, s3_obj: Object = None,
         >>> error
         ValueError('trzpyutils.s3.write_text_to_obj: specify either bucket and key, or an s3.Object, but not both')
     """  # noqa
-    log.info("writing object as file then uploading...")
-    log.info(f"with kwargs:\n{json.dumps(kwargs, indent=4)}")
+    log.info("writing text to object...")
+    if log.getLogger().isEnabledFor(log.INFO):
+        # default=str for values that aren't JSON, eg. Callback or Config
+        log.info("with kwargs:\n%s",
+                 json.dumps(kwargs, indent=4, default=str))
     msg = "trzpyutils.s3.write_text_to_obj: "
     if not s3_obj and not (bucket and key):
         msg += "specify either bucket and key, or an existing s3.Object"
@@ -465,21 +1039,27 @@ def write_text_to_obj(text: str, s3_obj: Object = None,
     elif bucket and key:
         s3_obj = S3_RESOURCE.Object(bucket_name=bucket, key=key)
 
-    # write the file to temp dir then upload by path
-    try:
-        filepath = f"/tmp/{uuid4()}"
-        with open(filepath, "w") as file:
-            file.write(text)
-    except Exception as e:
-        return e, s3_obj
+    # encoded like open(filepath, "w") would
+    data = text.encode(locale.getpreferredencoding(False))
+    # put() only takes ExtraArgs, others (eg. Callback, Config) need upload
+    if len(data) <= TRANSFER_CONFIG.multipart_threshold \
+            and kwargs.keys() <= {"ExtraArgs"}:
+        # small enough for one PUT, skip the multipart upload
+        try:
+            s3_obj.put(Body=data, **kwargs.get("ExtraArgs", {}))
+        except Exception as e:
+            return e, s3_obj
+        return None, s3_obj
 
-    # upload local file
+    # concurrent multipart upload straight from memory, it's already all
+    # there so spooling it to a temp file first would only add disk I/O
     try:
-        upload_obj(filepath, s3_obj, **kwargs)
+        error = _upload_with_progress(s3_obj, BytesIO(data), len(data),
+                                      **kwargs)
     except Exception as e:
         return e, s3_obj
 
-    return None, s3_obj
+    return error, s3_obj
 
 
 def get_obj_tags(s3_obj: Object):
@@ -642,11 +1222,12 @@ def get_object(bucket: str, key: str):
 
 
 def iter_lines_progress(s3_obj: Object = None, size_in_bytes: int = 0,
-                        chunk_size=1024, keepends=False):
+                        chunk_size=READ_CHUNK_BYTES, keepends=False):
     """Yield lines from s3 object with progress bar (speed)
 
-    This is achieved by reading chunk of bytes (of size chunk_size) at a
-    time from the raw stream, and then yielding lines from there.
+    This is achieved by reading chunk of bytes (of size chunk_size, 1 MiB
+    by default) at a time from the raw stream, and then yielding lines from
+    there. Bigger chunks mean fewer (per chunk) splits and bar updates.
 
     Example:
         >>> from trz_py_utils import s3
@@ -663,6 +1244,18 @@ def iter_lines_progress(s3_obj: Object = None, size_in_bytes: int = 0,
         >>> next(s3.iter_lines_progress(s3.get_object(bucket, key))).decode()
         'Col1~Col2~Col3'
     """
+    for lines in _iter_line_batches(s3_obj, size_in_bytes, chunk_size):
+        if keepends:
+            yield from lines
+        else:
+            # one split of the whole batch, instead of one per line
+            yield from b"".join(lines).splitlines()
+
+
+def _iter_line_batches(s3_obj: Object, size_in_bytes: int = 0,
+                       chunk_size=READ_CHUNK_BYTES):
+    """Yield the complete lines (with line endings) of each chunk read,
+    as one list per chunk, with a progress bar (speed)."""
     pending = b''
 
     opts = {
@@ -677,25 +1270,88 @@ def iter_lines_progress(s3_obj: Object = None, size_in_bytes: int = 0,
         client = s3_obj.meta.client
         obj = client.get_object(Bucket=s3_obj.bucket_name, Key=s3_obj.key)
         for chunk in obj["Body"].iter_chunks(chunk_size):
-            pbar.update(chunk_size)
+            # the last chunk is usually smaller than chunk_size
+            pbar.update(len(chunk))
             lines = (pending + chunk).splitlines(True)
-            for line in lines[:-1]:
-                yield line.splitlines(keepends)[0]
-            pending = lines[-1]
+            # the last line may continue in the next chunk
+            pending = lines.pop()
+            if lines:
+                yield lines
         if pending:
-            yield pending.splitlines(keepends)[0]
+            yield [pending]
+
+
+def _compile_reject_regex(pattern: bytes, use_re2=False):
+    """RE2 (linear time, no backtracking) if asked for, installed, and it
+    supports the pattern, else re. Note RE2's `$` only matches at the very
+    end, not also before a trailing newline like re's."""
+    if use_re2 and re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error as e:
+            log.info("re2 can't compile %s, using re: %s", pattern, e)
+    return re.compile(pattern)
+
+
+# a pattern without any of these is a plain string, eg. "NULL~"
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+# a pattern with none of these (besides "[^") matches the same in a line as
+# in many lines joined up, except it may also match across two of them
+_CONTEXT_ASSERTIONS = ("^", "$", "\\A", "\\Z", "\\b", "\\B",
+                       "(?=", "(?!", "(?<")
+
+
+def _is_literal(pattern: str) -> bool:
+    return not _REGEX_METACHARS.intersection(pattern)
+
+
+def _is_line_independent(pattern: str) -> bool:
+    pattern = pattern.replace("[^", "[")
+    return not any(a in pattern for a in _CONTEXT_ASSERTIONS)
 
 
 class S3Cleaner:
+    """Filter out the bad lines of a delimited s3 object, see rewrite().
+
+    Example:
+        >>> # every part but the last is >= 5MB after replacing NULLs
+        >>> from types import SimpleNamespace
+        >>> from trz_py_utils import s3
+        >>> data = b"a~b~c\\n" + b"NULL~NULL~" + b"x" * 20 + b"\\n"
+        >>> data = data[:6] + data[6:] * 500_000
+        >>> parts = {}
+        >>> class FakeClient:
+        ...     def get_object(self, **kwargs):
+        ...         chunks = lambda n: (data[i:i + n]
+        ...                             for i in range(0, len(data), n))
+        ...         return {"Body": SimpleNamespace(iter_chunks=chunks)}
+        ...     def create_multipart_upload(self, **kwargs):
+        ...         return {"UploadId": "id"}
+        ...     def upload_part(self, PartNumber, Body, **kwargs):
+        ...         parts[PartNumber] = bytes(Body)
+        ...         return {"ETag": str(PartNumber)}
+        ...     def complete_multipart_upload(self, **kwargs):
+        ...         pass
+        >>> fake_obj = SimpleNamespace(
+        ...     bucket_name="b", key="k",
+        ...     meta=SimpleNamespace(client=FakeClient()))
+        >>> s3c = s3.S3Cleaner(fake_obj, delim="~", null_handler="replace")
+        >>> s3c.rewrite("b", "out", size_in_bytes=len(data))
+        >>> [len(parts[n]) >= s3.MIN_PART_BYTES for n in sorted(parts)]
+        [True, True, False]
+        >>> b"".join(parts[n] for n in sorted(parts)).count(b"NULL")
+        0
+    """
+
     def __init__(self, s3_obj: Object, delim: str,
                  null_handler="drop",  # drop line or 'replace' with nothing
                  is_enforce_column_count=True,
                  reject_line_regex=[r"[^\x00-\x7F]"],
                  encoding="ascii",
+                 use_re2=False,  # google-re2 for reject_line_regex, if found
                  ):
-        self.s3fs = S3FileSystem(anon=False)
         self._lines: list[str] = []
-        self._text: bytes = b""
+        self._text = bytearray()  # accepted lines, until written
         self.bad_lines: list[str] = []
         self.num_good = -1
         self.num_bad = -1
@@ -705,15 +1361,18 @@ class S3Cleaner:
         self._i = 0
         self.delim = delim
         self.encoding = encoding
+        self._ascii_compatible = \
+            codecs.lookup(encoding).name in ASCII_COMPATIBLE_CODECS
         self.path = f"s3://{self.bucket}/{self.key}"
         self._regexes = reject_line_regex
+        self._use_re2 = use_re2
         self._set_headers()
         self._null_handler(null_handler, delim)
         self._column_count_enforcer(is_enforce_column_count, delim)
         self.set_regex(fmt.unique(self._regexes))
 
         log.info("setting default regex to:")
-        log.info(f"\t{self.regex}")
+        log.info("\t%s", self.regex)
 
     def _null_handler(self, null_handler: str, delim: str):
         # handle NULL
@@ -726,7 +1385,8 @@ class S3Cleaner:
                 f"{delim}NULL"
             ]
         elif null_handler == "replace":
-            self._find: bytes = f"NULL{self.delim}|{self.delim}NULL".encode()
+            self._find = re.compile(
+                f"NULL{self.delim}|{self.delim}NULL".encode())
             self._replace: bytes = self.delim.encode()
 
     def _column_count_enforcer(self, is_enforce_column_count: bool,
@@ -736,22 +1396,42 @@ class S3Cleaner:
             log.info("enforcing column count via regex")
             n = len(self.headers)
             d = delim
+            # possessive, so re doesn't backtrack through every field of
+            # lines that don't match (RE2 never backtracks, nor has them)
+            p = "" if self._use_re2 else "+"
             self._regexes += [
                 # more or less '\t' than in header row
-                rf"^(?:[^{d}]*{d}){{{n},}}[^{d}]*$",
-                rf"^(?:[^{d}]*{d}){{0,{n-2}}}[^{d}]*$",
+                rf"^(?:[^{d}]*{p}{d}){{{n},}}{p}[^{d}]*{p}$",
+                rf"^(?:[^{d}]*{p}{d}){{0,{n-2}}}{p}[^{d}]*{p}$",
             ]
 
     def set_regex(self, patterns_reject: list[str] = []):
         self.regex = "|".join(patterns_reject).encode()
-        log.info(f"setting regex to:\n\t{self.regex}")
+        # compiled once, instead of looked up in re's cache for every line
+        self._re = _compile_reject_regex(self.regex, self._use_re2)
+        # for _parse_lines() to rule out a whole chunk of lines at once:
+        # plain strings are found with `in` (a C substring search), other
+        # unanchored patterns searched for once in the whole chunk, each on
+        # its own (alternating them is much slower), and the rest per line
+        self._literals = [p.encode() for p in patterns_reject
+                          if _is_literal(p)]
+        self._chunk_res = [_compile_reject_regex(p.encode(), self._use_re2)
+                           for p in patterns_reject if not _is_literal(p)
+                           and _is_line_independent(p)]
+        per_line = [p for p in patterns_reject
+                    if not _is_line_independent(p)]
+        self._line_re = _compile_reject_regex(
+            "|".join(per_line).encode(), self._use_re2) if per_line else None
+        log.info("setting regex to:\n\t%s", self.regex)
 
     def _set_headers(self):
-        line = next(iter_lines_progress(self.obj)).decode()
+        # a small first read, only the header line is needed
+        line = next(iter_lines_progress(self.obj, chunk_size=1024)).decode()
         self.headers = line.split(self.delim)
         self._i += 1
         log.info("found headers:")
-        log.info(f"\t{fmt.dumps(self.headers)}")
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info("\t%s", fmt.dumps(self.headers))
 
     def _add_bad_line(self, **kwargs):
         bl = BadLine(path=self.path,
@@ -762,40 +1442,81 @@ class S3Cleaner:
             bl.print()
         self.bad_lines.append(bl)
 
-    def _replace_null(self):
+    def _replace_null(self, start: int):
+        # only the lines accepted since `start`, so the buffer is its final
+        # size when rewrite() checks it against the part size
         if self.null_handler == "replace":
-            self._text = re.sub(self._find, self._replace, self._text)
-
-    def _write(self, key_out: str):
-        log.info(f"writing s3 chunk (line {self._i})...")
-        # write a chunk at a time
-        with self.s3fs.open(f"{self.bucket}/{key_out}", "wb") as s3fs_out:
-            self._replace_null()
-            s3fs_out.write(self._text)
-            self._text = b""
+            self._text[start:] = self._find.sub(self._replace,
+                                                self._text[start:])
+
+    def _write(self):
+        # hand the buffer to the pool as the next part, and start a new one
+        part_number = len(self._parts) + 1
+        log.info("uploading s3 part %s (line %s)...", part_number, self._i)
+        if len(self._parts) >= self._max_workers:
+            # hold at most max_workers parts in memory if s3 is the bottleneck
+            self._parts[-self._max_workers].result()
+        body, self._text = self._text, bytearray()
+        self._parts.append(self._pool.submit(self._client.upload_part,
+                                             **self._upload,
+                                             PartNumber=part_number,
+                                             Body=body))
 
     def _parse_line(self, line):
-        try:
-            # turn binary lines iterator response into a string
-            string = line.decode(self.encoding)
-            # looking for regex matches to disqualify this line
-            bad_matches = [next(re.finditer(self.regex, line))]
-            self._add_bad_line(line=string, re_matches=bad_matches)
-        except UnicodeDecodeError as e:
-            # we don't have line string available
-            log.info(f"bad line :( i={self._i}: {e}")
-            self._add_bad_line(error=e)
-        except StopIteration:
+        # ASCII lines always decode, only check the others
+        if not (self._ascii_compatible and line.isascii()):
+            try:
+                line.decode(self.encoding)
+            except UnicodeDecodeError as e:
+                # we don't have line string available
+                log.info("bad line :( i=%s: %s", self._i, e)
+                self._add_bad_line(error=e)
+                return
+        # looking for regex matches to disqualify this line
+        match = self._re.search(line)
+        if match is None:
             # accept this line if no decode error and no regex match
-            self._text += line
+            self._text.extend(line)
+        else:
+            # only decode (again) the lines that get logged
+            self._add_bad_line(line=line.decode(self.encoding),
+                               re_matches=[match])
+
+    def _parse_lines(self, lines: list[bytes]):
+        """_parse_line() each line, but accept them all at once when none
+        match the regex and they're all ASCII (the common case)."""
+        start = len(self._text)
+        text = b"".join(lines)
+        # a match across two lines just means taking the slow path below
+        if self._ascii_compatible and text.isascii() \
+                and not any(literal in text for literal in self._literals) \
+                and not any(r.search(text) for r in self._chunk_res) \
+                and not (self._line_re
+                         and any(map(self._line_re.search, lines))):
+            self._i += len(lines)
+            self._text.extend(text)
+        else:
+            for line in lines:
+                self._i += 1
+                self._parse_line(line)
+        self._replace_null(start)
 
     def rewrite(self, bucket: str, key: str, size_in_bytes: int = None,
-                write_chunk_b=1024*1024):
-        """Reads a CSV from s3, filters out lines, and uploads
+                write_chunk_b=MIN_PART_BYTES,
+                max_workers=TRANSFER_CONFIG.max_concurrency,
+                read_chunk_b=READ_CHUNK_BYTES):
+        """Reads a CSV from s3, filters out lines, and uploads them as parts
+        of one multipart upload, which is aborted if anything goes wrong.
+        Parts upload on a thread pool while the next ones are being filtered.
 
         Args:
             size_in_bytes (int, optional): _description_. Defaults to None.
-            write_chunks (int, optional): write every n bytes. Defaults to 1MB
+            write_chunk_b (int, optional): upload a part every n bytes.
+                Defaults to (and at least) 5MB, S3's minimum part size.
+            max_workers (int, optional): parts uploading at once. Defaults
+                to TRANSFER_CONFIG.max_concurrency.
+            read_chunk_b (int, optional): filter lines read n bytes at a
+                time. Defaults to 1MB.
 
         Example:
             >>> from trz_py_utils import s3
@@ -810,7 +1531,7 @@ class S3Cleaner:
             >>> _ = s3.write_text_to_obj(text=text, bucket=bucket, key=key)
             >>> s3c = s3.S3Cleaner(s3.get_object(bucket, key), delim="~")
             >>> s3c.regex
-            b'[^\\\\x00-\\\\x7F]|NULL~|~NULL|^(?:[^~]*~){3,}[^~]*$|^(?:[^~]*~){0,1}[^~]*$'
+            b'[^\\\\x00-\\\\x7F]|NULL~|~NULL|^(?:[^~]*+~){3,}+[^~]*+$|^(?:[^~]*+~){0,1}+[^~]*+$'
             >>> s3c.headers
             ['Col1', 'Col2', 'Col3']
             >>> s3c.rewrite(bucket, "s3-rewrite.txt")
@@ -825,25 +1546,79 @@ class S3Cleaner:
             if error:
                 raise error
 
-        # read object line by line
-        for binary_line in iter_lines_progress(self.obj, size_in_bytes,
-                                               keepends=True):
-            # only write lines if no regex match
-            self._i += 1
-            self._parse_line(binary_line)
-
-            # write every megabyte (1024*1024)
-            if self._i % (write_chunk_b) == 0:
-                self._write(key_out=key)
-        # write the remainder
-        if self._text:
-            self._write(key_out=key)
+        write_chunk_b = max(write_chunk_b, MIN_PART_BYTES)
+        self._client = self.obj.meta.client
+        response = self._client.create_multipart_upload(Bucket=bucket,
+                                                        Key=key)
+        self._upload = {"Bucket": bucket, "Key": key,
+                        "UploadId": response["UploadId"]}
+        self._parts = []  # upload_part() futures, in part order
+        self._max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            # read object a chunk of lines at a time
+            for binary_lines in _iter_line_batches(self.obj, size_in_bytes,
+                                                   read_chunk_b):
+                # only write lines if no regex match
+                self._parse_lines(binary_lines)
+
+                # upload a part every write_chunk_b bytes
+                if len(self._text) >= write_chunk_b:
+                    self._write()
+            # upload the remainder, it's fine for the last part to be small
+            if self._text or not self._parts:
+                self._write()
+            parts = [{"PartNumber": n, "ETag": part.result()["ETag"]}
+                     for n, part in enumerate(self._parts, start=1)]
+            self._client.complete_multipart_upload(
+                **self._upload, MultipartUpload={"Parts": parts})
+        except BaseException:
+            log.error("aborting multipart upload to s3://%s/%s", bucket, key)
+            # drop queued parts and let running ones finish before aborting
+            for part in self._parts:
+                part.cancel()
+            self._pool.shutdown()
+            self._client.abort_multipart_upload(**self._upload)
+            raise
+        finally:
+            self._pool.shutdown()
 
         self.num_bad = len(self.bad_lines)
         self.num_good = self._i
 
 
+@lru_cache(maxsize=4096)
+def _urlsplit(url: str) -> SplitResult:
+    """urlsplit(), once per url when S3Objects are made from the same ones.
+    The results are (immutable) named tuples, so safe to share. Unlike
+    urlparse() it leaves ";" in the path, where it's part of the key."""
+    return urlsplit(url)
+
+
+# urlsplit() does more than split on these (IPv6 hosts, removed whitespace)
+_URLSPLIT_SPECIAL = re.compile(r"[\[\]\t\r\n]")
+
+
+def _split_url(url: str) -> tuple[str, str, bool]:
+    """(netloc, path, has query or fragment) of a url, the way urlsplit()
+    splits it, but with a few string methods for plain s3:// and http(s)://
+    urls (eg. every S3Object made from a listing)."""
+    scheme, sep, rest = url.partition("://")
+    if scheme not in ("s3", "https", "http") or not url.isascii() \
+            or _URLSPLIT_SPECIAL.search(url):
+        split: SplitResult = _urlsplit(url)
+        return split.netloc, split.path, bool(split.query or split.fragment)
+    # in the same order as urlsplit(): fragment, query, then netloc
+    rest, _, fragment = rest.partition("#")
+    rest, _, query = rest.partition("?")
+    netloc, slash, path = rest.partition("/")
+    return netloc, slash + path, bool(query or fragment)
+
+
 class S3Object:
+    __slots__ = ("bucket_name", "key", "obj", "s3_uri", "_console_url",
+                 "_url")
+
     def __init__(self,
                  bucket: str = None,
                  key: str = None,
@@ -864,6 +1639,9 @@ class S3Object:
             console_url (str, optional): _description_. Defaults to None.
             s3_uri (str, optional): _description_. Defaults to None.
 
+        Raises:
+            ValueError: if none of the forms above were passed.
+
         Example:
             >>> from trz_py_utils.s3 import S3Object
             >>> s3_obj = S3Object("b", "k")
@@ -882,12 +1660,16 @@ class S3Object:
         Example:
             >>> from trz_py_utils.s3 import S3Object
             >>> s3_obj = S3Object(s3_uri="s3://bucket/path/to/key.json")
+            >>> s3_obj.s3_uri
+            's3://bucket/path/to/key.json'
             >>> "s3.console.aws.amazon.com" in s3_obj.console_url
             True
             >>> s3_obj.console_url
             'https://s3.console.aws.amazon.com/s3/object/bucket?region=us-east-2&prefix=path%2Fto%2Fkey.json'
             >>> S3Object(console_url=s3_obj.console_url).key
             'path/to/key.json'
+            >>> S3Object(s3_uri="my-s3-bucket/key.json").s3_uri
+            's3://my-s3-bucket/key.json'
 
         Example:
             >>> from trz_py_utils.s3 import S3Object
@@ -898,58 +1680,123 @@ class S3Object:
         """  # noqa
         # eg. s3://bucket/path/to/key
         # eg. bucket/path/to/key
+        # decide the form once, then parse it once
         if obj:
-            self.bucket_name = obj.bucket_name
-            self.key = obj.key
-        elif s3_uri and "amazonaws.com" in s3_uri:
-            self.bucket_name, self.key = self._parse_direct_url(s3_uri)
-        elif s3_uri and "s3://" in s3_uri:
-            self.bucket_name, self.key = self._parse_s3_uri(s3_uri)
+            self.bucket_name, self.key = obj.bucket_name, obj.key
+        elif s3_uri:
+            if "amazonaws.com" in s3_uri:
+                self.bucket_name, self.key = self._parse_direct_url(s3_uri)
+            else:
+                self.bucket_name, self.key = self._parse_s3_uri(s3_uri)
         elif console_url:
             self.bucket_name, self.key = self._parse_console_url(console_url)
         elif bucket and key:
-            self.bucket_name = bucket
-            self.key = key
+            self.bucket_name, self.key = bucket, key
+        else:
+            raise ValueError("pass one of obj, s3_uri, console_url or "
+                             f"bucket and key, not {bucket=} {key=}")
+
+        # reuse an Object we were given instead of building another
+        self.obj = obj or get_object(self.bucket_name, self.key)
+        self.s3_uri = f"s3://{self.bucket_name}/{self.key}"
+        # made when first read, see the properties below
+        self._console_url = console_url
+        self._url = None
+
+    @property
+    def console_url(self) -> str:
+        if self._console_url is None:
+            self._console_url = make_console_url(self.obj)
+        return self._console_url
+
+    @property
+    def url(self) -> str:
+        if self._url is None:
+            self._url = make_s3_url(self.obj)
+        return self._url
+
+    @classmethod
+    def from_keys(cls, bucket: str, keys: list[str], load: bool = False,
+                  max_workers: int = None) -> list["S3Object"]:
+        """Many S3Objects in one bucket, sharing the module's S3 resource
+        (and so its client and pooled connections).
+
+        Building an S3Object makes no request. With `load`, each object's
+        metadata (size, etag, ...) is fetched up front with concurrent
+        HEADs instead of lazily, one at a time, on first attribute access.
+
+        Args:
+            bucket (str): bucket name shared by all the keys.
+            keys (list[str]): object keys.
+            load (bool, optional): HEAD every object now. Defaults to False.
+            max_workers (int, optional): concurrent HEADs. Defaults to the
+                client's max_pool_connections.
 
-        self.obj = get_object(self.bucket_name, self.key)
-        self.console_url = console_url or make_console_url(self.obj)
-        self.s3_uri = f"s3://{bucket}/{key}"
-        self.url = make_s3_url(self.obj)
+        Returns:
+            list[S3Object]: in the same order as `keys`
+
+        Example:
+            >>> from trz_py_utils.s3 import S3Object
+            >>> s3_objs = S3Object.from_keys("b", ["k1", "k2"])
+            >>> [s3_obj.s3_uri for s3_obj in s3_objs]
+            ['s3://b/k1', 's3://b/k2']
+
+        Example:
+            >>> from trz_py_utils.s3 import S3Object
+            >>> s3_objs = S3Object.from_keys("trz-s3-test", ["figure-65.png"],
+            ...                              load=True)
+            >>> s3_objs[0].obj.content_length > 0
+            True
+        """
+        s3_objs = [cls(obj=S3_RESOURCE.Object(bucket, key)) for key in keys]
+        if load and s3_objs:
+            s3_client: S3Client = S3_RESOURCE.meta.client
+            max_workers = max_workers or _pool_size(s3_client)
+
+            def head(s3_obj: "S3Object") -> dict:
+                return s3_client.head_object(Bucket=bucket, Key=s3_obj.key)
+
+            # threads only share the client, resource Objects aren't
+            # thread-safe, so what load() does with each HEAD is done here
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for s3_obj, response in zip(s3_objs, pool.map(head, s3_objs)):
+                    s3_obj.obj.meta.data = response
+
+        return s3_objs
 
     def _parse_s3_uri(self, s3_uri: str):
         s3_uri = unquote(s3_uri)
-        s3_uri = f"s3://{s3_uri}" if "s3" not in s3_uri else s3_uri
-        url: ParseResult = urlparse(s3_uri)
-        if url.params or url.query or url.fragment:
+        if not s3_uri.startswith("s3://"):
+            s3_uri = f"s3://{s3_uri}"
+        bucket, path, has_query = _split_url(s3_uri)
+        if has_query:
             raise ValueError(f"pass arg console_url not s3_uri: {s3_uri}")
 
-        bucket = url.netloc
-        key = url.path.strip("/")
+        key = path.strip("/")
 
         return bucket, key
 
     def _parse_console_url(self, console_url: str):
         # https://s3.console.aws.amazon.com/s3/object/trz-fmcsa-dev?region=us-east-2&bucketType=general&prefix=headers/crash_carriers/CrashCarrier_01012018_12312018HDR.txt.json
         console_url = unquote(console_url)
-        invalid = [
-            urlparse(console_url).netloc != "s3.console.aws.amazon.com",
-            "s3/object/" not in console_url,
-            "prefix=" not in console_url,
-        ]
-        if any(invalid):
+        netloc, _, _ = _split_url(console_url)
+        if netloc != "s3.console.aws.amazon.com" \
+                or "s3/object/" not in console_url \
+                or "prefix=" not in console_url:
             raise ValueError(f"not a console url: {console_url}")
 
-        bucket = console_url.split("s3/object/")[1].split("?")[0]
-        key = console_url.split("prefix=")[1].split("&")[0]
+        bucket = console_url.partition("s3/object/")[2].partition("?")[0]
+        key = console_url.partition("prefix=")[2].partition("&")[0]
 
         return bucket, key
 
     def _parse_direct_url(self, url: str):
         # eg. https://trz-s3-test.s3.us-east-2.amazonaws.com/figure-65.png
         # eg. https://trz-s3-test.s3.amazonaws.com/figure-65.png?X-Amz-Algor...
-        url = unquote(url)
-        bucket = urlparse(url).netloc.split(".")[0]
-        key = urlparse(url).path.strip("/")
+        # unquote after parsing, the key may have an encoded "#" or "?"
+        netloc, path, _ = _split_url(url)
+        bucket = netloc.partition(".")[0]
+        key = unquote(path).strip("/")
         return bucket, key
 
     def new_prefix(self, prefix: str):
@@ -973,12 +1820,8 @@ class S3Object:
             'out/key.json'
         """  # noqa
         # strip off trailing "/" from prefix
-        prefix = prefix[:-1] if prefix[-1] == "/" else prefix
-
-        # append prefix if one doesn't already exist
-        if "/" not in self.key:
-            return f"{prefix}/{self.key}"
+        prefix = prefix.removesuffix("/")
 
-        # replace prefix if it exists
-        key_no_root = self.key.split("/", maxsplit=1)[1]
-        return f"{prefix}/{key_no_root}"
+        # replace prefix if it exists, else append one (one scan of the key)
+        _, has_root, key_no_root = self.key.partition("/")
+        return f"{prefix}/{key_no_root if has_root else self.key}"
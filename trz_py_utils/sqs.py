@@ -1,7 +1,4 @@
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from aws_lambda_powertools.utilities.data_classes import (
-    APIGatewayProxyEventV2,
-)
 from boto3 import client
 from mypy_boto3_sqs import SQSClient
 from typing import Any
@@ -45,6 +42,9 @@ def make_queue_url_from_sqs_event(event: dict[str, Any]):
     Args:
         event (dict[str, Any]): Lambda event passed to handler
 
+    Raises:
+        ValueError: if the eventSourceARN doesn't have 6 ":" parts
+
     Returns:
         str: SQS queue URL, useful for message deletion upon success
 
@@ -68,15 +68,27 @@ def make_queue_url_from_sqs_event(event: dict[str, Any]):
         ...     "eventSourceARN": "arn:aws:sqs:us-west-2:123456789012:MyQueue"
         ... }]})
         'https://sqs.us-west-2.amazonaws.com/123456789012/MyQueue'
+        >>> make_queue_url_from_sqs_event({"Records": [{
+        ...     "eventSourceARN": "arn:aws:sqs:us-west-2:123:Queue:WithColon"
+        ... }]})
+        'https://sqs.us-west-2.amazonaws.com/123/Queue:WithColon'
+        >>> make_queue_url_from_sqs_event({"Records": [{
+        ...     "eventSourceARN": "arn:aws:sqs:MyQueue"
+        ... }]})
+        Traceback (most recent call last):
+          ...
+        ValueError: malformed SQS ARN: arn:aws:sqs:MyQueue
     """
     if "Records" not in event:
         raise NotImplementedError("no SQS 'Records' in event dict")
     elif len(event["Records"]) > 1:
         raise NotImplementedError("can't handle multiple SQS records")
-    arn_parts = event["Records"][0]["eventSourceARN"].split(":")
-    region = arn_parts[3]
-    account_id = arn_parts[4]
-    queue_name = arn_parts[5]
+    # the resource (queue name) is everything after the 5th ":"
+    arn = event["Records"][0]["eventSourceARN"]
+    arn_parts = arn.split(":", 5)
+    if len(arn_parts) != 6:
+        raise ValueError(f"malformed SQS ARN: {arn}")
+    _, _, _, region, account_id, queue_name = arn_parts
 
     return f"https://sqs.{region}.amazonaws.com/{account_id}/{queue_name}"
 
@@ -113,8 +125,10 @@ def parse_sqs_body(event: dict[str, Any],
         1
     """  # noqa
     try:
-        log.debug(json.dumps(event, indent=4))
-        records = APIGatewayProxyEventV2(event).get("Records")
+        if log.getLogger().isEnabledFor(log.DEBUG):
+            log.debug(json.dumps(event, indent=4))
+        # a plain dict lookup, same as the powertools event wrapper's get()
+        records = event.get("Records")
         if len(records) > 1:
             raise NotImplementedError("can't handle multiple SQS records")
         return None, records[0]["body"]
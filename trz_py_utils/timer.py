@@ -1,46 +1,92 @@
 import time
 import logging as log
-from tabulate import tabulate
+
+
+STATS_HEADERS = ["metric name", "count name", "count", "elapsed (s)",
+                 "speed (rows/s)"]
+
+
+class _Watch:
+    """state of one named stopwatch, in time.perf_counter_ns() units"""
+    __slots__ = ("start_ns", "stop_ns", "elapsed_ns")
+
+    def __init__(self):
+        self.start_ns = 0
+        self.stop_ns = None  # not stopped yet
+        self.elapsed_ns = 0  # exact (int) total, so repeated stops don't drift
+
+
+def _seconds(ns: int) -> float:
+    """nanoseconds to the 0.1s that elapseds, stop() and tables show"""
+    return round(ns / 1e9, 1)
 
 
 class Stopwatch:
     """This class keeps track of named stopwatches for timing sections of code.
     """
     def __init__(self):
-        self.starts = {}
-        self.stops = {}
-        self.elapseds = {}  # seconds elapsed by name
+        self._watches: dict[str, _Watch] = {}  # one lookup per start/stop
         self.counts = {}  # row counts by name
         self.watch_counts = {}  # map seconds elapsed to row counts
 
+    @property
+    def starts(self) -> dict[str, int]:
+        return {n: w.start_ns for n, w in self._watches.items()}
+
+    @property
+    def stops(self) -> dict[str, int]:
+        return {n: w.stop_ns for n, w in self._watches.items()
+                if w.stop_ns is not None}
+
+    @property
+    def elapseds(self) -> dict[str, float]:
+        """seconds elapsed (to 0.1s) by name, of the watches stopped at
+        least once"""
+        return {n: _seconds(w.elapsed_ns) for n, w in self._watches.items()
+                if w.stop_ns is not None}
+
+    def _elapsed(self, name) -> float:
+        """seconds elapsed, raising KeyError like elapseds[name] would"""
+        watch = self._watches.get(name)
+        if watch is None or watch.stop_ns is None:
+            raise KeyError(name)
+        return _seconds(watch.elapsed_ns)
+
     def print(self, **kwargs):
-        log.info("[Stopwatch]"+"".join([f"[{v}]" for v in kwargs.values()]))
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info("[Stopwatch]%s",
+                     "".join([f"[{v}]" for v in kwargs.values()]))
 
     def start(self, name=None):
-        name = name or f"timer_{len(self.starts)}"
-        self.starts[name] = time.time()
+        name = name or f"timer_{len(self._watches)}"
+        watch = self._watches.get(name)
+        if watch is None:
+            watch = self._watches[name] = _Watch()
+        watch.start_ns = time.perf_counter_ns()
 
     def stop(self, name=None, count=None, count_name=None):
-        name = name or f"timer_{len(self.starts)-1}"
-        self.stops[name] = time.time()
+        stop_ns = time.perf_counter_ns()
+        name = name or f"timer_{len(self._watches)-1}"
+        watch = self._watches[name]
+        watch.stop_ns = stop_ns
 
-        elapsed = self.stops[name] - self.starts[name]
-        if name in self.elapseds:
-            self.elapseds[name] += elapsed
-        else:
-            self.elapseds[name] = elapsed
-        self.elapseds[name] = round(self.elapseds[name], 1)
+        # monotonic, and summed as ints, and only rounded when read
+        watch.elapsed_ns += stop_ns - watch.start_ns
+        elapsed = _seconds(watch.elapsed_ns)
 
         if count is not None:
             count_name = count_name or name
             self.counts[count_name] = {name: int(count)}
-            elapsed = self.elapseds[name]
-            count = self.counts[count_name][name]
-            self.print(watch=name, msg=f"elapsed={elapsed}, count={count:,}")
-        else:
-            self.print(watch=name, msg=f"elapsed={self.elapseds[name]}")
+        # don't format messages nobody will see, eg. timing tight loops
+        if log.getLogger().isEnabledFor(log.INFO):
+            if count is not None:
+                count = self.counts[count_name][name]
+                self.print(watch=name,
+                           msg=f"elapsed={elapsed}, count={count:,}")
+            else:
+                self.print(watch=name, msg=f"elapsed={elapsed}")
 
-        return self.elapseds[name]
+        return elapsed
 
     def summary_string(self, names: list = [], timers: dict = {}, decimals=1):
         if len(names) > 0:
@@ -68,7 +114,7 @@ class Stopwatch:
             else:
                 msg = "(name of counter and name of watch) OR name of watch"
                 raise ValueError(f"must specify either: {msg}")
-            elapsed = round(self.elapseds[watch_name], 2)
+            elapsed = round(self._elapsed(watch_name), 2)
             speed = int(count/elapsed) if elapsed else 0
         except KeyError:
             self.print(msg=f"ERROR failed to find watch '{watch_name}'")
@@ -82,15 +128,23 @@ class Stopwatch:
 
     def make_stats_table(self, count_names=[], watch_names=[],
                          sort_by="metric name"):
-        """print summary of counts, elapsed seconds, and rows-per-second."""
+        """print summary of counts, elapsed seconds, and rows-per-second,
+        sorted by one of STATS_HEADERS (numbers numerically)."""
+        # ~25ms to import, only paid by processes which print a summary
+        from tabulate import tabulate
+
+        if sort_by not in STATS_HEADERS:
+            raise ValueError(f"sort_by must be one of {STATS_HEADERS}")
         print_rows = []
         n_counts = len(count_names)
         n_watches = len(watch_names)
         # filter for count names AND watch names
         if n_counts > 0 and n_watches > 0:
-            for count_name in [n for n in count_names if n in self.counts]:
-                counts = self.counts[count_name]
-                for watch_name in [n for n in watch_names if n in counts]:
+            watch_names = set(watch_names)
+            for count_name in count_names:
+                # each count name has a single watch name, test it in the set
+                counts = self.counts.get(count_name, {})
+                for watch_name in [n for n in counts if n in watch_names]:
                     print_rows.append(self._stats_row(count_name, watch_name))
         # if no filter specified and stopwatch has counts, print them all
         elif n_counts == 0 and n_watches == 0 and len(self.counts) > 0:
@@ -98,17 +152,18 @@ class Stopwatch:
                 for watch_name in self.counts[count_name]:
                     print_rows.append(self._stats_row(count_name, watch_name))
         # if no filter and stopwatch has no counts, print any/all watch names
-        elif n_counts == 0 and n_watches == 0 and len(self.elapseds) > 0:
+        elif n_counts == 0 and n_watches == 0 and self._watches:
             for watch_name in self.elapseds:
                 print_rows.append(self._stats_row(watch_name=watch_name))
 
-        return tabulate(print_rows,
-                        headers=[
-                            "metric name",
-                            "count name",
-                            "count",
-                            "elapsed (s)",
-                            "speed (rows/s)"],
+        i = STATS_HEADERS.index(sort_by)
+        if i < 2:
+            print_rows.sort(key=lambda row: row[i])
+        else:
+            # the numbers are already formatted, eg. "12,345"
+            print_rows.sort(key=lambda row: float(row[i].replace(",", "")))
+
+        return tabulate(print_rows, headers=STATS_HEADERS,
                         tablefmt="fancy_grid")
 
     def print_summary(self, count_names=[],